@@ -1,25 +1,24 @@
-from datetime import datetime
+from datetime import date
+from functools import lru_cache
 
 
-# 获取当前日期和时间
-NOW = datetime.now()
-# 1~7 对应 周一 ~ 周日
-WEEK: int = NOW.weekday() + 1
-DAY: int = NOW.day
+# 任务开关：True 表示每天运行，否则为判断当天日期是否运行的函数
+# d.isoweekday() 1~7 对应 周一 ~ 周日，d.day 为当月第几天
+
 
 # 第一轮任务
 ONE = {
     "邪神秘宝": True,
-    "华山论剑": DAY <= 26,
+    "华山论剑": lambda d: d.day <= 26,
     "斗豆月卡": True,
-    "兵法": WEEK in [4, 6],
+    "兵法": lambda d: d.isoweekday() in [4, 6],
     "分享": True,
     "乐斗": True,
     "报名": True,
     "巅峰之战进行中": True,
     "矿洞": True,
-    "掠夺": WEEK in [2, 3],
-    "踢馆": WEEK in [5, 6],
+    "掠夺": lambda d: d.isoweekday() in [2, 3],
+    "踢馆": lambda d: d.isoweekday() in [5, 6],
     "竞技场": True,
     "十二宫": True,
     "许愿": True,
@@ -27,7 +26,7 @@ ONE = {
     "历练": True,
     "镖行天下": True,
     "幻境": True,
-    "群雄逐鹿": WEEK == 6,
+    "群雄逐鹿": lambda d: d.isoweekday() == 6,
     "画卷迷踪": True,
     "门派": True,
     "门派邀请赛": True,
@@ -41,7 +40,7 @@ ONE = {
     "武林盟主": True,
     "全民乱斗": True,
     "侠士客栈": True,
-    "大侠回归三重好礼": WEEK == 4,
+    "大侠回归三重好礼": lambda d: d.isoweekday() == 4,
     "乐斗黄历": True,
     "飞升大作战": True,
     "深渊之潮": True,
@@ -60,7 +59,7 @@ ONE = {
     "猜单双": True,
     "煮元宵": True,
     "万圣节": True,
-    "元宵节": WEEK == 4,
+    "元宵节": lambda d: d.isoweekday() == 4,
     "神魔转盘": True,
     "乐斗驿站": True,
     "浩劫宝箱": True,
@@ -86,12 +85,12 @@ ONE = {
     "新春拜年": True,
     "喜从天降": True,
     "节日福利": True,
-    "5.1礼包": WEEK == 4,
-    "端午有礼": WEEK == 4,
-    "圣诞有礼": WEEK == 4,
-    "新春礼包": WEEK == 4,
-    "登录商店": WEEK == 4,
-    "盛世巡礼": WEEK == 4,
+    "5.1礼包": lambda d: d.isoweekday() == 4,
+    "端午有礼": lambda d: d.isoweekday() == 4,
+    "圣诞有礼": lambda d: d.isoweekday() == 4,
+    "新春礼包": lambda d: d.isoweekday() == 4,
+    "登录商店": lambda d: d.isoweekday() == 4,
+    "盛世巡礼": lambda d: d.isoweekday() == 4,
     "新春登录礼": True,
     "年兽大作战": True,
     "惊喜刮刮卡": True,
@@ -101,31 +100,80 @@ ONE = {
     "乐斗大笨钟": True,
     "乐斗激运牌": True,
     "乐斗能量棒": True,
-    "乐斗回忆录": WEEK == 4,
-    "爱的同心结": WEEK == 4,
-    "周年生日祝福": WEEK == 4,
+    "乐斗回忆录": lambda d: d.isoweekday() == 4,
+    "爱的同心结": lambda d: d.isoweekday() == 4,
+    "周年生日祝福": lambda d: d.isoweekday() == 4,
     "重阳太白诗会": True,
 }
 
 # 第二轮任务
 TWO = {
     "邪神秘宝": True,
-    "问鼎天下": WEEK not in [6, 7],
+    "问鼎天下": lambda d: d.isoweekday() not in [6, 7],
     "帮派商会": True,
     "任务派遣中心": True,
     "侠士客栈": True,
     "深渊之潮": True,
     "侠客岛": True,
     "背包": True,
-    "镶嵌": WEEK == 4,
-    "神匠坊": DAY == 20,
-    "每日宝箱": DAY == 20,
+    "镶嵌": lambda d: d.isoweekday() == 4,
+    "神匠坊": lambda d: d.day == 20,
+    "每日宝箱": lambda d: d.day == 20,
     "商店": True,
     "幸运金蛋": True,
     "新春拜年": True,
     "乐斗大笨钟": True,
 }
 
-# 当天可以执行的大乐斗任务
-MISSIONS_ONE = [k for k, v in ONE.items() if v]
-MISSIONS_TWO = [k for k, v in TWO.items() if v]
+ROUNDS = {
+    "one": ONE,
+    "two": TWO,
+}
+
+# 任务最早运行时间（HH:MM），定时错峰启动时较早启动的账号会把这些任务推迟到该时间之后运行
+# 例如 "巅峰之战进行中": "13:30"
+START_AFTER: dict[str, str] = {}
+
+# 任务独占的服务器状态，持有相同状态的任务不会交错运行：
+# 一个任务冷却暂停期间，其它持有相同状态的任务排队，等该任务结束后再运行
+RESOURCES: dict[str, str] = {
+    # 分享逐层挑战斗神塔，节日福利自动挑战并结束挑战斗神塔
+    "分享": "towerfight",
+    "节日福利": "towerfight",
+}
+
+# 单个任务的请求次数上限，超过后中止该任务，防止页面异常时循环请求拖慢其它任务和账号
+# 未列出的任务使用 settings.yaml 中的 REQUEST_BUDGET；other 模式的升级任务按用户每次选择重新计算
+REQUEST_BUDGET: dict[str, int] = {
+    "幻境": 100,
+    "每日宝箱": 100,
+    "帮派远征军": 400,
+    "背包": 2000,
+    "佣兵": 3000,
+}
+
+# 大乐斗首页任务名称 -> 函数名称（不是合法函数名称的任务）
+FUNC_NAMES = {
+    "5.1礼包": "五一礼包",
+}
+
+
+@lru_cache(maxsize=4)
+def _get_missions(round_name: str, today: date) -> tuple[str, ...]:
+    """
+    返回某天可以执行的大乐斗任务，按日期缓存
+    """
+    return tuple(k for k, v in ROUNDS[round_name].items() if v is True or v(today))
+
+
+def get_missions(round_name: str, today: date | None = None) -> list[str]:
+    """
+    返回当天（或指定日期）可以执行的大乐斗任务
+
+    每次调用时按当前日期计算，定时守护进程跨天运行无需重启
+
+    Args:
+        round_name：one 或者 two
+        today：指定日期，默认今天
+    """
+    return list(_get_missions(round_name, today or date.today()))
@@ -0,0 +1,124 @@
+"""
+本模块为任务函数离线基准测试
+
+先录制真实请求：
+python main.py --one --record
+
+再回放录制的页面，统计每个任务的 CPU 时间、耗时、请求次数及内存分配峰值：
+python main.py --bench one
+python main.py --bench one 邪神秘宝 背包
+"""
+
+import time
+import tracemalloc
+from pathlib import Path
+
+from loguru import logger
+
+from daledou import one, two
+from daledou.limiter import RateLimiter
+from daledou.replay import FIXTURES_DIR, FixtureStore, ReplayTransport
+from daledou.runner import check_missions
+from daledou.utils import DaLeDou, bind_dld, read_yaml
+
+
+_MISSIONS = {
+    "one": one.MISSIONS,
+    "two": two.MISSIONS,
+}
+
+
+def _load_yaml(qq: str) -> dict:
+    """
+    返回QQ任务配置，不存在时使用默认配置
+    """
+    if Path(f"./config/{qq}.yaml").exists():
+        return read_yaml(f"{qq}.yaml")
+    return read_yaml("daledou.yaml")
+
+
+def bench_account(path: Path, round_name: str, names: list[str]) -> list[dict]:
+    """
+    回放单个账号的录制文件，返回每个任务的统计
+    """
+    qq = path.stem
+    missions = _MISSIONS[round_name]
+    store = FixtureStore(path).load()
+    transport = ReplayTransport(store)
+    D = DaLeDou(
+        qq, transport, _load_yaml(qq), {"one": [], "two": []}, RateLimiter(False)
+    )
+
+    rows = []
+    with bind_dld(D):
+        for name in names:
+            store.rewind()
+            requests = transport.requests
+            D.func_name = name
+            error = ""
+
+            tracemalloc.start()
+            cpu = time.process_time()
+            wall = time.perf_counter()
+            try:
+                # 回放时不需要等待冷却
+                for _ in missions[name].steps(D):
+                    pass
+            except Exception as e:
+                error = str(e)
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            rows.append(
+                {
+                    "qq": qq,
+                    "name": name,
+                    "cpu": cpu,
+                    "wall": wall,
+                    "requests": transport.requests - requests,
+                    "misses": len(store.misses),
+                    "peak": peak,
+                    "error": error,
+                }
+            )
+    return rows
+
+
+def run_bench(round_name: str, names: list[str], fixtures_dir: Path = FIXTURES_DIR):
+    """
+    回放 fixtures_dir 中所有账号的录制文件并打印每个任务的统计
+    """
+    if round_name not in _MISSIONS:
+        print(f"bench 模式第一个参数只能是：{'、'.join(_MISSIONS)}")
+        return
+    missions = _MISSIONS[round_name]
+    if not check_missions(round_name, missions, names):
+        return
+
+    paths = sorted(fixtures_dir.glob("*.jsonl"))
+    if not paths:
+        print(
+            f"{fixtures_dir} 没有录制文件，请先运行：python main.py --{round_name} --record"
+        )
+        return
+
+    # 回放时任务日志只会干扰统计
+    logger.remove()
+
+    rows = []
+    for path in paths:
+        rows += bench_account(path, round_name, names or list(missions))
+
+    print("--" * 20)
+    print(
+        f"{'QQ':<12}{'任务':<12}{'CPU(ms)':>10}{'耗时(ms)':>10}{'请求':>6}{'未录制':>6}{'峰值(KiB)':>10}"
+    )
+    for r in sorted(rows, key=lambda i: i["cpu"], reverse=True):
+        print(
+            f"{r['qq']:<12}{r['name']:<12}{r['cpu'] * 1000:>10.2f}{r['wall'] * 1000:>10.2f}"
+            f"{r['requests']:>6}{r['misses']:>6}{r['peak'] / 1024:>10.1f}"
+            + (f"  异常：{r['error']}" if r["error"] else "")
+        )
+    print("--" * 20)
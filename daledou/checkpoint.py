@@ -0,0 +1,65 @@
+"""
+本模块为第一轮、第二轮任务的断点记录
+
+完整运行某一轮时，每完成一个任务就追加写入 ./log/QQ/checkpoint-轮次-日期.txt，
+进程中断（网络异常、Termux被杀、电脑休眠）后当天重新运行该轮会跳过已完成的任务，
+只运行剩余任务；出现异常的任务不会记录，重新运行时再次执行
+
+命令行指定任务名称时不跳过也不记录；python main.py --one --fresh 忽略断点重新运行全部任务
+"""
+
+import os
+from datetime import date
+from pathlib import Path
+
+
+# 是否跳过断点记录中已完成的任务
+_resume = True
+
+
+def disable_resume() -> None:
+    """
+    忽略已有断点记录，重新运行全部任务（仍然写入新的断点记录）
+    """
+    global _resume
+    _resume = False
+
+
+class Checkpoint:
+    """
+    单个账号某一轮当天的断点记录
+    """
+
+    def __init__(self, qq: str, round_name: str, today: date | None = None):
+        today = today or date.today()
+        log_dir = Path(f"./log/{qq}")
+        self.path = log_dir / f"checkpoint-{round_name}-{today:%Y-%m-%d}.txt"
+        # 已完成的任务名称
+        self.done: set[str] = set()
+
+        if not _resume:
+            self.path.unlink(missing_ok=True)
+        elif self.path.exists():
+            self.done = set(self.path.read_text(encoding="utf-8").split())
+
+        # 清理该轮以前日期的断点记录
+        for path in log_dir.glob(f"checkpoint-{round_name}-*.txt"):
+            if path != self.path:
+                path.unlink(missing_ok=True)
+
+    def remaining(self, func_name_list: list) -> list:
+        """
+        返回尚未完成的任务，保持原有顺序
+        """
+        return [i for i in func_name_list if i not in self.done]
+
+    def mark(self, func_name: str) -> None:
+        """
+        记录任务已完成，立即写入磁盘
+        """
+        self.done.add(func_name)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as fp:
+            fp.write(f"{func_name}\n")
+            fp.flush()
+            os.fsync(fp.fileno())
@@ -0,0 +1,96 @@
+"""
+本模块为大乐斗商店批量兑换
+
+各商店单次兑换支持的数量不同（如 times=10、times=25），ExchangePlanner 按支持的数量从大到小兑换，
+某个数量兑换失败（积分不足等）时降级为更小的数量继续兑换剩余部分，最小数量也失败则停止
+
+无法识别的响应（既没有成功也没有失败关键字）至多重试 MAX_RETRIES 次，不会无限请求
+"""
+
+# 无法识别的响应连续出现的最大次数
+MAX_RETRIES = 3
+
+
+class ExchangePlanner:
+    """
+    单个商店物品的批量兑换
+
+    Args:
+        urls：单次兑换数量 -> 兑换链接（请求参数）
+        success：兑换成功关键字
+        failure：兑换失败关键字，为空时所有非成功响应都视为失败
+        max_retries：无法识别的响应最多重试次数
+    """
+
+    def __init__(
+        self,
+        urls: dict[int, str],
+        success: str = "成功",
+        failure: tuple[str, ...] = (),
+        max_retries: int = MAX_RETRIES,
+    ):
+        # 按单次兑换数量从大到小排列
+        self.urls = dict(sorted(urls.items(), reverse=True))
+        self.success = success
+        self.failure = failure
+        self.max_retries = max_retries
+        # 已兑换数量
+        self.exchanged = 0
+        # 实际请求次数
+        self.requests = 0
+
+    @property
+    def saved(self) -> int:
+        """
+        相比逐个兑换节省的请求次数
+        """
+        return max(self.exchanged - self.requests, 0)
+
+    def _is_failure(self, html: str) -> bool:
+        if not self.failure:
+            return True
+        return any(i in html for i in self.failure)
+
+    def _exchange_size(self, D, size: int, count: int, mode: str, name) -> int:
+        """
+        以 size 为单次数量至多兑换 count 次，返回成功次数
+        """
+        url = self.urls[size]
+        n = 0
+        retries = 0
+        while n < count:
+            D.get(url)
+            self.requests += 1
+            D.find(mode, name)
+            if self.success in D.html:
+                n += 1
+                retries = 0
+            elif self._is_failure(D.html):
+                break
+            else:
+                retries += 1
+                if retries >= self.max_retries:
+                    D.print_info("兑换响应无法识别，停止兑换", name)
+                    break
+        return n
+
+    def exchange(self, D, number: int, mode="<br />(.*?)<", name=None) -> int:
+        """
+        兑换 number 个物品，返回实际兑换数量
+
+        Args:
+            D：大乐斗实例
+            number：兑换数量
+            mode、name：传给 D.find 的正则表达式和打印名称
+        """
+        remaining = number
+        for size in self.urls:
+            if count := remaining // size:
+                remaining -= self._exchange_size(D, size, count, mode, name) * size
+        self.exchanged += number - remaining
+        if self.saved:
+            D.print_info(
+                f"兑换{number - remaining}个，请求{self.requests}次，节省{self.saved}次",
+                name,
+            )
+        return number - remaining
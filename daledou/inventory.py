@@ -0,0 +1,127 @@
+"""
+本模块为大乐斗背包物品模型
+
+Inventory.fetch 读取第一页得到总页数后同时请求其余页面，解析所有物品并建立索引：
+    id -> 物品
+    名称单字及二元组（相邻两个字符）-> 物品，用于名称模糊搜索
+
+其余页面只读取到物品列表结尾的"商店"，不下载和解码页面尾部
+
+two.背包 的配置匹配、other.背包 的交互搜索及背包物品数量查询共用同一份数据，不会重复请求
+"""
+
+import re
+
+
+# 背包第一页，页面包含总页数
+_FIRST_PAGE = "cmd=store&store_type=0"
+# 物品列表的开始、结束标记
+_START, _STOP = "清理", "商店"
+# 正则表达式特殊字符，物品匹配名称不包含时按普通子串查找
+_REGEX_CHARS = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+
+def _ngrams(text: str) -> set[str]:
+    """
+    返回字符串的所有二元组，单个字符返回自身
+    """
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i : i + 2] for i in range(len(text) - 1)}
+
+
+def parse_page(html: str) -> list[dict]:
+    """
+    返回背包页面中的物品：[{"id": ..., "name": ..., "number": ...}, ...]
+    """
+    if "使用规则" in html or _START not in html:
+        return []
+    _, html = html.split(_START, 1)
+    html, _ = html.split(_STOP, 1)
+    return [
+        {"id": _id, "name": name, "number": int(number)}
+        for _id, name, number in re.findall(r'id=(\d+)">([^<]*)</a>数量：(\d+)', html)
+    ]
+
+
+class Inventory:
+    """
+    背包物品及索引
+    """
+
+    def __init__(self, items: list[dict]):
+        self.items = items
+        # id -> 物品
+        self._ids: dict[str, dict] = {}
+        # 小写名称单字及二元组 -> 物品索引
+        self._grams: dict[str, set[int]] = {}
+        for i, item in enumerate(items):
+            self._ids.setdefault(item["id"], item)
+            name = item["name"].lower()
+            # 单个字符用于单字搜索，二元组用于多字搜索
+            for gram in set(name) | _ngrams(name):
+                self._grams.setdefault(gram, set()).add(i)
+
+    @classmethod
+    def fetch(cls, D) -> "Inventory":
+        """
+        请求所有背包页面，第一页之外的页面同时请求
+        """
+        D.get(_FIRST_PAGE)
+        first = D.html
+        pages = int(D.findall(r"第1/(\d+)")[0])
+        params = [f"{_FIRST_PAGE}&page={p}" for p in range(2, pages + 1)]
+        D.print_info(f"共 {pages} 页")
+
+        items = parse_page(first)
+        for p, html in zip(params, D.gather(params, stop=_STOP)):
+            if _START not in html:
+                # 截止标记出现在物品列表之前，重新读取完整页面
+                html = D.get(p)
+            items += parse_page(html)
+        return cls(items)
+
+    def get(self, item_id: str | int) -> dict | None:
+        """
+        返回物品id对应的物品，不存在返回None
+        """
+        return self._ids.get(str(item_id))
+
+    def count(self, item_id: str | int) -> int:
+        """
+        返回物品id数量，不存在返回0
+        """
+        item = self.get(item_id)
+        return item["number"] if item else 0
+
+    def search(self, query: str) -> list[dict]:
+        """
+        返回id等于 query 或名称包含 query（不区分大小写）的物品
+        """
+        query = query.lower()
+        if not query:
+            return []
+        indexes = None
+        for gram in _ngrams(query):
+            found = self._grams.get(gram, set())
+            indexes = found if indexes is None else indexes & found
+            if not indexes:
+                break
+
+        result = [
+            item
+            for i in sorted(indexes or ())
+            if query in (item := self.items[i])["name"].lower()
+        ]
+        if (item := self.get(query)) is not None and item not in result:
+            result.insert(0, item)
+        return result
+
+    def match(self, pattern: str) -> list[dict]:
+        """
+        返回名称匹配 pattern 的物品，pattern 支持全字、部分名称及正则表达式
+        """
+        if not _REGEX_CHARS.search(pattern):
+            return [i for i in self.search(pattern) if pattern in i["name"]]
+        regex = re.compile(pattern)
+        return [i for i in self.items if regex.search(i["name"])]
@@ -0,0 +1,153 @@
+"""
+本模块为大乐斗请求自适应限速
+
+按请求参数中的 cmd 分组，每组一个令牌桶：
+    响应正常时逐步提高速率（加性增）
+    出现"系统繁忙"或"操作频繁"时速率减半（乘性减），并按指数退避加随机抖动后重试
+
+限速器只在请求事件循环中使用，不需要加锁
+"""
+
+import asyncio
+import random
+import re
+import time
+
+
+# 初始速率、最低速率、最高速率（次/秒）
+_INIT_RATE = 10.0
+_MIN_RATE = 0.5
+_MAX_RATE = 20.0
+# 响应正常时速率增加值
+_RATE_STEP = 0.5
+# 令牌桶容量
+_BURST = 5.0
+
+# 服务器繁忙提示及对应的首次退避秒数
+PUSHBACK = {
+    "系统繁忙": 0.2,
+    "操作频繁": 0.8,
+}
+# 单次退避上限（秒）
+_MAX_BACKOFF = 5.0
+# 单个请求最多发送次数
+MAX_ATTEMPTS = 3
+
+_CMD_PATTERN = re.compile(r"cmd=([^&]+)")
+
+
+def get_cmd(params: str) -> str:
+    """
+    返回请求参数中的 cmd 名称
+    """
+    if result := _CMD_PATTERN.search(params):
+        return result.group(1)
+    return ""
+
+
+def get_pushback(html: str) -> str | None:
+    """
+    返回响应内容中的服务器繁忙提示，没有则返回None
+    """
+    for key in PUSHBACK:
+        if key in html:
+            return key
+
+
+class _Bucket:
+    """
+    单个 cmd 的令牌桶
+    """
+
+    def __init__(self):
+        self.rate = _INIT_RATE
+        self.tokens = _BURST
+        self.updated = time.monotonic()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(_BURST, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class RateLimiter:
+    """
+    按 cmd 分组的 AIMD 令牌桶限速器
+    """
+
+    def __init__(self, enabled: bool = True):
+        # 为False时不限速也不退避（离线回放），只计数
+        self._enabled = enabled
+        self._buckets: dict[str, _Bucket] = {}
+        # 因限速而等待的请求次数
+        self.throttled = 0
+        # 服务器繁忙后重试的次数
+        self.retried = 0
+        # 重试次数用尽仍然繁忙的请求次数
+        self.gave_up = 0
+
+    def _bucket(self, cmd: str) -> _Bucket:
+        if cmd not in self._buckets:
+            self._buckets[cmd] = _Bucket()
+        return self._buckets[cmd]
+
+    def rate(self, cmd: str) -> float:
+        """
+        返回 cmd 当前速率（次/秒）
+        """
+        return self._bucket(cmd).rate
+
+    async def acquire(self, cmd: str) -> None:
+        """
+        获取一个令牌，令牌不足时等待
+
+        先预留令牌再等待（令牌数可为负），同时等待的多个请求按预留顺序依次放行
+        """
+        if not self._enabled:
+            return
+        bucket = self._bucket(cmd)
+        bucket.refill()
+        bucket.tokens -= 1
+        if bucket.tokens < 0:
+            self.throttled += 1
+            await asyncio.sleep(-bucket.tokens / bucket.rate)
+
+    def on_success(self, cmd: str) -> None:
+        """
+        响应正常，加性提高速率
+        """
+        bucket = self._bucket(cmd)
+        bucket.rate = min(_MAX_RATE, bucket.rate + _RATE_STEP)
+
+    def on_pushback(self, cmd: str) -> None:
+        """
+        服务器繁忙，乘性降低速率
+        """
+        bucket = self._bucket(cmd)
+        bucket.rate = max(_MIN_RATE, bucket.rate / 2)
+
+    async def backoff(self, pushback: str, attempt: int) -> None:
+        """
+        重试前指数退避（带随机抖动）
+        """
+        self.retried += 1
+        if not self._enabled:
+            return
+        delay = PUSHBACK[pushback] * (2**attempt) * random.uniform(0.5, 1.5)
+        await asyncio.sleep(min(_MAX_BACKOFF, delay))
+
+    def on_give_up(self) -> None:
+        """
+        重试次数用尽
+        """
+        self.gave_up += 1
+
+    def stats(self) -> dict:
+        """
+        返回限速计数
+        """
+        return {
+            "throttled": self.throttled,
+            "retried": self.retried,
+            "gave_up": self.gave_up,
+        }
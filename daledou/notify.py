@@ -0,0 +1,147 @@
+"""
+本模块为pushplus微信通知队列
+
+push 只把消息放入队列，由后台线程发送，不会阻塞任务：
+    BATCH_SECONDS 秒内到达的多个账号消息合并为一条发送，减少推送次数
+    复用同一个连接，请求设置超时，失败时指数退避重试
+    进程退出前等待队列中的消息发送完成
+"""
+
+import atexit
+import queue
+import threading
+import time
+
+import requests
+from loguru import logger
+
+
+PUSHPLUS_URL = "http://www.pushplus.plus/send/"
+# 合并消息的等待秒数
+BATCH_SECONDS = 3
+# 单条推送内容的最大字符数，超过后另起一条
+MAX_CONTENT = 15000
+# 发送失败最多重试次数及首次重试等待秒数
+MAX_RETRIES = 3
+RETRY_SECONDS = 2
+# 单次请求超时秒数
+TIMEOUT = 10
+# 进程退出时最多等待秒数
+FLUSH_SECONDS = 60
+
+
+class Notifier:
+    """
+    pushplus后台推送队列
+    """
+
+    def __init__(self, batch_seconds: float = BATCH_SECONDS):
+        self._batch_seconds = batch_seconds
+        self._queue: queue.Queue[tuple[str, str, str]] = queue.Queue()
+        self._session = requests.Session()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def push(self, token: str, title: str, content: str) -> None:
+        """
+        将消息放入队列，立即返回
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._worker, name="pushplus", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.flush)
+        self._queue.put((token, title, content))
+
+    def flush(self, timeout: float = FLUSH_SECONDS) -> None:
+        """
+        等待队列中的消息发送完成，至多等待 timeout 秒
+        """
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.1)
+
+    def _collect(self) -> list[tuple[str, str, str]]:
+        """
+        取出第一条消息后再等待 batch_seconds 秒收集其余消息
+        """
+        items = [self._queue.get()]
+        deadline = time.monotonic() + self._batch_seconds
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _worker(self) -> None:
+        while True:
+            items = self._collect()
+            try:
+                for token, title, content in _merge(items):
+                    self._send(token, title, content)
+            except Exception as e:
+                logger.error(f"pushplus推送异常：{e}")
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+    def _send(self, token: str, title: str, content: str) -> None:
+        """
+        发送一条推送，网络异常或服务器错误时退避重试
+        """
+        data = {
+            "token": token,
+            "title": title,
+            "content": content,
+        }
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                res = self._session.post(PUSHPLUS_URL, data=data, timeout=TIMEOUT)
+                res.raise_for_status()
+                logger.success(f"pushplus推送信息：{res.json()}")
+                return
+            except requests.RequestException as e:
+                if attempt == MAX_RETRIES:
+                    logger.error(f"pushplus推送失败：{title}，{e}")
+                    return
+                time.sleep(RETRY_SECONDS * 2**attempt)
+
+
+def _merge(items: list[tuple[str, str, str]]) -> list[tuple[str, str, str]]:
+    """
+    将同一token的多条消息合并，单条消息原样发送
+    """
+    groups: dict[str, list[tuple[str, str]]] = {}
+    for token, title, content in items:
+        groups.setdefault(token, []).append((title, content))
+
+    merged = []
+    for token, messages in groups.items():
+        batch: list[tuple[str, str]] = []
+        size = 0
+        for title, content in messages:
+            if batch and size + len(content) > MAX_CONTENT:
+                merged.append((token, *_join(batch)))
+                batch, size = [], 0
+            batch.append((title, content))
+            size += len(content)
+        merged.append((token, *_join(batch)))
+    return merged
+
+
+def _join(batch: list[tuple[str, str]]) -> tuple[str, str]:
+    """
+    返回合并后的标题和内容
+    """
+    if len(batch) == 1:
+        return batch[0]
+    title = f"{batch[0][0]} 等{len(batch)}条通知"
+    content = "\n\n".join(f"【{t}】\n{c}" for t, c in batch)
+    return title, content
+
+
+# 进程内共用的推送队列
+NOTIFIER = Notifier()
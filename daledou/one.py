@@ -11,11 +11,12 @@ python main.py --one 邪神秘宝
 python main.py --one 邪神秘宝 矿洞
 """
 
-import time
 import random
 import re
 
-from daledou.utils import push, yield_dld_objects
+from daledou.exchange import ExchangePlanner
+from daledou.runner import build_missions, run_round
+from daledou.utils import DaLeDouProxy, SessionRegistry
 from daledou.common import (
     c_邪神秘宝,
     c_问鼎天下,
@@ -29,37 +30,16 @@ from daledou.common import (
 )
 
 
-def run_one(unknown_args: list = None):
-    global D
-    for D in yield_dld_objects():
-        if unknown_args:
-            func_name_list = unknown_args
-            is_push = False
-        else:
-            func_name_list = D.func_map["one"]
-            is_push = True
-
-        for func_name in func_name_list:
-            print("--" * 20)
-            D.func_name = func_name
-            D.msg_append(f"\n【{func_name}】")
-            try:
-                globals()[func_name]()
-            except Exception as e:
-                D.print_info(f"出现异常，本任务结束：{e}")
-                D.msg_append("出现异常，本任务结束，详情查看日志")
-        D.run_time()
-
-        if is_push:
-            print("--" * 20)
-            # pushplus微信推送消息
-            push(f"{D.qq} one", D.msg_join)
-        else:
-            print("--" * 20)
-            print("--------------模拟微信信息--------------")
-            print(D.msg_join)
+# 当前线程绑定的大乐斗实例
+D = DaLeDouProxy()
+
 
-        print("--" * 20)
+def run_one(
+    unknown_args: list = None,
+    registry: SessionRegistry | None = None,
+    stagger: bool = False,
+):
+    run_round("one", MISSIONS, unknown_args, registry, stagger)
 
 
 # ============================================================
@@ -132,20 +112,13 @@ def 战阵调整() -> bool:
 def 荣誉兑换():
     yaml: dict = D.yaml["华山论剑"]
     for name, _id, number in get_yaml_exchange(yaml):
-        n = 0
-        for _ in range(number // 10):
-            D.get(f"cmd=knightarena&op=exchange&id={_id}&times=10")
-            D.find()
-            if "成功" not in D.html:
-                break
-            n += 10
-        for _ in range(number - n):
-            D.get(f"cmd=knightarena&op=exchange&id={_id}&times=1")
-            D.find()
-            if "成功" not in D.html:
-                break
-            n += 1
-        if n:
+        e = ExchangePlanner(
+            {
+                10: f"cmd=knightarena&op=exchange&id={_id}&times=10",
+                1: f"cmd=knightarena&op=exchange&id={_id}&times=1",
+            }
+        )
+        if n := e.exchange(D, number):
             D.msg_append(f"兑换{name}*{n}")
 
 
@@ -236,6 +209,8 @@ def 分享():
     """
     每天至多一键分享9次，斗神塔每次挑战11层以增加一次分享次数
     周四领取奖励，若全部已领取则重置分享
+
+    斗神塔冷却期间让出（yield 冷却秒数），由运行引擎先运行其它任务
     """
     # 达人等级对应斗神塔CD时间
     cd = {
@@ -271,7 +246,7 @@ def 分享():
             # 开始挑战 or 挑战下一层
             D.get("cmd=towerfight&type=0")
             D.find(name="斗神塔")
-            time.sleep(second)
+            yield second
             if "您战胜了" not in D.html:
                 end = True
                 break
@@ -283,7 +258,7 @@ def 分享():
     # 自动挑战
     D.get("cmd=towerfight&type=11")
     D.find(name="斗神塔")
-    time.sleep(second)
+    yield second
     if "结束挑战" in D.html:
         # 结束挑战
         D.get("cmd=towerfight&type=7")
@@ -764,20 +739,13 @@ def 门派():
 def 门派邀请赛_商店兑换():
     yaml: dict = D.yaml["门派邀请赛"]
     for name, _id, number in get_yaml_exchange(yaml):
-        n = 0
-        for _ in range(number // 10):
-            D.get(f"cmd=exchange&subtype=2&type={_id}&times=10")
-            D.find()
-            if "成功" not in D.html:
-                break
-            n += 10
-        for _ in range(number - n):
-            D.get(f"cmd=exchange&subtype=2&type={_id}&times=1")
-            D.find()
-            if "成功" not in D.html:
-                break
-            n += 1
-        if n:
+        e = ExchangePlanner(
+            {
+                10: f"cmd=exchange&subtype=2&type={_id}&times=10",
+                1: f"cmd=exchange&subtype=2&type={_id}&times=1",
+            }
+        )
+        if n := e.exchange(D, number):
             D.msg_append(f"兑换{name}*{n}")
 
 
@@ -817,20 +785,13 @@ def 门派邀请赛():
 def 会武_商店兑换():
     yaml: dict = D.yaml["会武"]
     for name, _id, number in get_yaml_exchange(yaml):
-        n = 0
-        for _ in range(number // 10):
-            D.get(f"cmd=exchange&subtype=2&type={_id}&times=10")
-            D.find()
-            if "成功" not in D.html:
-                break
-            n += 10
-        for _ in range(number - n):
-            D.get(f"cmd=exchange&subtype=2&type={_id}&times=1")
-            D.find()
-            if "成功" not in D.html:
-                break
-            n += 1
-        if n:
+        e = ExchangePlanner(
+            {
+                10: f"cmd=exchange&subtype=2&type={_id}&times=10",
+                1: f"cmd=exchange&subtype=2&type={_id}&times=1",
+            }
+        )
+        if n := e.exchange(D, number):
             D.msg_append(f"兑换{name}*{n}")
 
 
@@ -1098,14 +1059,12 @@ def 帮派黄金联赛_参战():
         D.msg_append("没有可攻击的敌人")
         return
 
-    uin = []
-    if pages := D.find(r'pages=(\d+)">末页'):
-        _pages = pages
-    else:
-        _pages = 1
-    for p in range(1, int(_pages) + 1):
-        D.get(f"cmd=factionleague&op=2&pages={p}")
-        uin += D.findall(r"%&nbsp;&nbsp;(\d+).*?opp_uin=(\d+)")
+    pages = D.find(r'pages=(\d+)">末页')
+    uin = D.get_pages(
+        "cmd=factionleague&op=2&pages={page}",
+        r"%&nbsp;&nbsp;(\d+).*?opp_uin=(\d+)",
+        int(pages or 1),
+    )
 
     # 按战力从低到高排序
     uins = sorted(uin, key=lambda x: float(x[0]))
@@ -1271,24 +1230,11 @@ def 飞升大作战():
 def 许愿帮铺():
     yaml: dict = D.yaml["深渊之潮"]["许愿帮铺"]
     for name, _id, number in get_yaml_exchange(yaml):
-        n = 0
+        urls = {1: f"cmd=abysstide&op=wishexchange&id={_id}"}
         if "之书" in name:
-            quotient = number // 25
-        else:
-            quotient = 0
-        for _ in range(quotient):
-            D.get(f"cmd=abysstide&op=wishexchangetimes&id={_id}&times=25")
-            D.find(name=name)
-            if "成功" not in D.html:
-                break
-            n += 25
-        for _ in range(number - n):
-            D.get(f"cmd=abysstide&op=wishexchange&id={_id}")
-            D.find(name=name)
-            if "成功" not in D.html:
-                break
-            n += 1
-        if n:
+            # 之书支持一次兑换25个
+            urls[25] = f"cmd=abysstide&op=wishexchangetimes&id={_id}&times=25"
+        if n := ExchangePlanner(urls).exchange(D, number, name=name):
             D.msg_append(f"兑换{name}*{n}")
 
 
@@ -1398,27 +1344,19 @@ def 遗迹商店():
     yaml: dict = D.yaml["时空遗迹"]["遗迹商店"]
     for t, _dict in yaml.items():
         for name, _id, number in get_yaml_exchange(_dict):
-            n = 0
-            for _ in range(number // 10):
-                # 兑换十次
-                D.get(f"cmd=spacerelic&op=buy&type={t}&id={_id}&num=10")
-                D.find(
-                    r"售卖区.*?<br /><br /><br />(.*?)<",
-                    f"时空遗迹-遗迹商店-{name}",
-                )
-                if "兑换成功" not in D.html:
-                    break
-                n += 10
-            for _ in range(number - n):
-                # 兑换一次
-                D.get(f"cmd=spacerelic&op=buy&type={t}&id={_id}&num=1")
-                D.find(
-                    r"售卖区.*?<br /><br /><br />(.*?)<",
-                    f"时空遗迹-遗迹商店-{name}",
-                )
-                if "兑换成功" not in D.html:
-                    break
-                n += 1
+            e = ExchangePlanner(
+                {
+                    10: f"cmd=spacerelic&op=buy&type={t}&id={_id}&num=10",
+                    1: f"cmd=spacerelic&op=buy&type={t}&id={_id}&num=1",
+                },
+                success="兑换成功",
+            )
+            n = e.exchange(
+                D,
+                number,
+                r"售卖区.*?<br /><br /><br />(.*?)<",
+                f"时空遗迹-遗迹商店-{name}",
+            )
             if n:
                 D.msg_append(f"兑换{name}*{n}")
 
@@ -2595,7 +2533,7 @@ def 节日福利_斗神塔():
             # 结束挑战
             D.get("cmd=towerfight&type=7")
             D.find(name="节日福利-斗神塔")
-            time.sleep(3)
+            yield 3
         else:
             break
         n += 1
@@ -2609,7 +2547,7 @@ def 节日福利():
     """
     节日福利_历练()
     if D.week == 4:
-        节日福利_斗神塔()
+        yield from 节日福利_斗神塔()
 
 
 def 五一礼包():
@@ -2950,3 +2888,7 @@ def 重阳太白诗会():
     """
     D.get("cmd=newAct&subtype=168&op=2")
     D.msg_append(D.find(r"<br /><br />(.*?)<br />"))
+
+
+# 任务注册表
+MISSIONS = build_missions("one", globals())
@@ -5,13 +5,26 @@
 python main.py --other 神装
 """
 
-from daledou.utils import yield_dld_objects
+from loguru import logger
+
+from daledou.exchange import ExchangePlanner
+from daledou.inventory import Inventory
+from daledou.runner import build_missions, check_missions
+from daledou.utils import (
+    DaLeDouProxy,
+    RequestBudgetExceeded,
+    get_request_budget,
+    yield_dld_objects,
+)
+
+
+# 当前线程绑定的大乐斗实例
+D = DaLeDouProxy()
 
 
 _FUNC_NAME = [
     "神装",
     "夺宝奇兵",
-    "江湖长梦",
     "星盘",
     "新元婴神器",
     "深渊之潮",
@@ -23,34 +36,29 @@ _FUNC_NAME = [
 ]
 
 
-def check_func_name_existence(func_name: str):
-    """
-    判断函数名称是否存在
-    """
-    if func_name not in _FUNC_NAME:
-        print("other 模式支持以下参数：")
-        for i in _FUNC_NAME:
-            print(i)
-        print("--" * 20)
-        raise KeyError(func_name)
-
-
 def run_other(unknown_args: list):
-    global D
     if not unknown_args:
         print("请携带以下一个参数：")
-        for i in _FUNC_NAME:
+        for i in MISSIONS:
             print(i)
         print("--" * 20)
         return
 
+    # 登录之前检查任务名称
+    if not check_missions("other", MISSIONS, unknown_args):
+        return
+
     for D in yield_dld_objects():
+        SNAPSHOT.invalidate()
         print("--" * 20)
         for func_name in unknown_args:
-            check_func_name_existence(func_name)
             D.func_name = func_name
+            D.request_budget = get_request_budget(func_name, MISSIONS[func_name].budget)
             D.msg_append(f"\n【{func_name}】")
-            globals()[func_name]()
+            try:
+                MISSIONS[func_name].run(D)
+            except RequestBudgetExceeded as e:
+                logger.warning(f"{D.qq} | {func_name}：{e}")
 
         print("--" * 20)
 
@@ -77,12 +85,64 @@ def compute(fail_value, deplete_value, now_value, total_value) -> int:
     return total_deplete
 
 
+class Snapshot:
+    """
+    当前账号的商店积分、背包物品数量及详情页面缓存
+
+    同一账号内重复读取直接使用缓存页面，只有兑换、使用、升级会改变这些数据，
+    执行后按类别失效，下次读取重新请求
+    """
+
+    # 缓存类别：商店积分、背包物品数量、技能等详情页面
+    POINTS = "points"
+    BACKPACK = "backpack"
+    DETAIL = "detail"
+
+    def __init__(self):
+        # 类别 -> 请求参数 -> 页面
+        self._pages: dict[str, dict[str, str]] = {
+            self.POINTS: {},
+            self.BACKPACK: {},
+            self.DETAIL: {},
+        }
+        # 背包物品，读取过完整背包后物品数量查询不再请求
+        self.inventory: Inventory | None = None
+
+    def get(self, params: str, kind: str = DETAIL) -> str:
+        """
+        读取页面并赋值给 D.html，有缓存时不发送请求
+        """
+        pages = self._pages[kind]
+        if params in pages:
+            D.html = pages[params]
+        else:
+            D.get(params)
+            pages[params] = D.html
+        return D.html
+
+    def invalidate(self, *kinds: str):
+        """
+        清空指定类别的缓存，不指定则全部清空
+        """
+        for kind in kinds or self._pages:
+            self._pages[kind].clear()
+            if kind == self.BACKPACK:
+                self.inventory = None
+
+
+# 当前账号的页面缓存，run_other 切换账号时清空
+SNAPSHOT = Snapshot()
+
+
 def get_backpack_item_count(item_id: str | int) -> int:
     """
     返回背包物品id数量
     """
+    if SNAPSHOT.inventory is not None:
+        return SNAPSHOT.inventory.count(item_id)
+
     # 背包物品详情
-    D.get(f"cmd=owngoods&id={item_id}")
+    SNAPSHOT.get(f"cmd=owngoods&id={item_id}", Snapshot.BACKPACK)
     if "很抱歉" in D.html:
         number = 0
     else:
@@ -95,7 +155,7 @@ def get_store_points(params: str) -> int:
     返回商店积分
     """
     # 商店
-    D.get(params)
+    SNAPSHOT.get(params, Snapshot.POINTS)
     result = D.findall(r"<br />(.*?)<")[0]
     _, store_points = result.split("：")
     return int(store_points)
@@ -107,10 +167,10 @@ class Exchange:
     """
 
     def __init__(self, url: dict, consume_num: int, possess_num: int):
-        # 材料兑换10个链接
-        self.exchange_ten_url = url["ten"]
-        # 材料兑换一个链接
-        self.exchange_one_url = url["one"]
+        # 材料兑换10个链接、兑换一个链接，不足时停止兑换
+        self.planner = ExchangePlanner(
+            {10: url["ten"], 1: url["one"]}, failure=("不足",)
+        )
         # 材料消耗数量
         self.consume_num = consume_num
         # 材料拥有数量
@@ -125,29 +185,11 @@ class Exchange:
             return
 
         exchange_num = self.consume_num - self.possess_num
-        ten_count, one_count = divmod(exchange_num, 10)
-        if not self.exchange_count(self.exchange_ten_url, ten_count):
-            return
-        if not self.exchange_count(self.exchange_one_url, one_count):
-            return
-
-        # 兑换成功则两者数量一致
-        self.possess_num = self.consume_num
+        if n := self.planner.exchange(D, exchange_num):
+            self.possess_num += n
+            SNAPSHOT.invalidate(Snapshot.POINTS, Snapshot.BACKPACK)
         print("--" * 20)
 
-    def exchange_count(self, url: str, count: int) -> bool:
-        """
-        兑换足够数量返回True，否则返回False
-        """
-        while count > 0:
-            D.get(url)
-            D.find()
-            if "成功" in D.html:
-                count -= 1
-            elif "不足" in D.html:
-                return False
-        return True
-
     def update_possess_num(self):
         """
         更新材料拥有数量
@@ -205,6 +247,8 @@ class Input:
         将用户选择的技能升级
         """
         while True:
+            # 请求次数上限按每次选择计算，只防止单次升级的页面循环，不限制整个交互过程
+            D.reset_request_budget()
             if skill_params is None:
                 s = skill_class()
             else:
@@ -231,6 +275,8 @@ class Input:
                     continue
                 if s.data[_input]["是否升级"]:
                     s.upgrade(_input)
+                    # 升级消耗材料并改变详情，积分只在兑换时失效
+                    SNAPSHOT.invalidate(Snapshot.BACKPACK, Snapshot.DETAIL)
                     break
                 else:
                     print(f">>>{_input}：材料或者积分不足，不能升级")
@@ -325,7 +371,7 @@ class ShenZhuang:
         获取神装匹配数据
         """
         # 神装
-        D.get(f"cmd=outfit&op=0&magic_outfit_id={_id}")
+        SNAPSHOT.get(f"cmd=outfit&op=0&magic_outfit_id={_id}")
         if ("10阶" in D.html) or ("必成" in D.html):
             return
 
@@ -450,7 +496,7 @@ class ShenJi:
         data = []
         for _id in range(6):
             # 神装
-            D.get(f"cmd=outfit&op=0&magic_outfit_id={_id}")
+            SNAPSHOT.get(f"cmd=outfit&op=0&magic_outfit_id={_id}")
             data += D.findall(r'skill_id=(\d+)">升级十次.*?等级：(\d+)')
 
         return [_id for _id, level in data if level != "10"]
@@ -470,15 +516,15 @@ class ShenJi:
             # 神技名称
             name = D.findall(r"<br />=(.*?)=<a")[0]
             # 当前等级
-            level = D.findall(r"当前等级：(\d+)")[0]
+            level = D.page.digits_after("当前等级：", required=True)
             # 材料消耗名称
             consume_name = "神秘精华"
             # 升级消耗数量
             consume_num = int(D.findall(r"\*(\d+)<")[0])
             # 升级成功率
-            success = D.findall(r"升级成功率：(.*?)<")[0]
+            success = D.page.value_after("升级成功率：", required=True)
             # 当前效果
-            effect = D.findall(r"当前效果：(.*?)<")[0]
+            effect = D.page.value_after("当前效果：", required=True)
 
             is_upgrade = True if store_num >= consume_num else False
 
@@ -666,7 +712,7 @@ class XingPan:
         """
         data = {}
         for name, gem in self.star_gem.items():
-            D.get(f"cmd=astrolabe&op=showgemupgrade&gem_type={gem}")
+            SNAPSHOT.get(f"cmd=astrolabe&op=showgemupgrade&gem_type={gem}")
             result = D.findall(r"gem=(\d+)")[1:]
 
             # 2~7级星石合成id
@@ -682,7 +728,7 @@ class XingPan:
         """
         data = {}
         for name, gem in self.star_gem.items():
-            D.get(f"cmd=astrolabe&op=showgemupgrade&gem_type={gem}")
+            SNAPSHOT.get(f"cmd=astrolabe&op=showgemupgrade&gem_type={gem}")
             result = D.findall(r"（(\d+)）")[1:]
 
             # 1~6级星石数量
@@ -1657,13 +1703,13 @@ class YongBing:
             # 名称
             name = D.findall(r"<br /><br />(.+?)(?=<| )")[0]
             # 战力
-            combat_power = D.findall(r"战力：(\d+)")[0]
+            combat_power = D.page.digits_after("战力：", required=True)
             # 资质
-            aptitude = D.findall(r"资质：(.*?)<")[0]
+            aptitude = D.page.value_after("资质：", required=True)
             # 悟性
-            savvy = D.findall(r"悟性：(\d+)")[0]
+            savvy = D.page.digits_after("悟性：", required=True)
             # 等级
-            level = D.findall(r"等级：(\d+)")[0]
+            level = D.page.digits_after("等级：", required=True)
 
             if self.mission_name == "资质还童":
                 # 卓越资质或者等级不为1时取消还童（还童会将等级重置为1）
@@ -1771,41 +1817,14 @@ class 背包:
     def __init__(self):
         self.search(self.get_data())
 
-    def get_data(self) -> list[dict]:
+    def get_data(self) -> Inventory:
         """
-        获取背包数据
+        获取背包数据，之后的背包物品数量查询直接使用
         """
-        data = []
-        # 背包
-        D.get("cmd=store")
-        page = int(D.findall(r"第1/(\d+)")[0])
-        for p in range(1, (page + 1)):
-            D.get(f"cmd=store&store_type=0&page={p}")
-            _, _html = D.html.split("清理")
-            D.html, _ = _html.split("商店")
-            for _id, name, number in D.findall(r'id=(\d+)">(.*?)</a>数量：(\d+)'):
-                data.append(
-                    {
-                        "id": _id,
-                        "name": name,
-                        "number": number,
-                    }
-                )
-
-        return data
+        SNAPSHOT.inventory = Inventory.fetch(D)
+        return SNAPSHOT.inventory
 
-    def search_backpack(self, query, items):
-        """
-        执行背包搜索
-        """
-        results = []
-        for item in items:
-            # 同时匹配ID（精确匹配）和名称（模糊匹配）
-            if item["id"] == query or query.lower() in item["name"].lower():
-                results.append(item)
-        return results
-
-    def search(self, data: list):
+    def search(self, data: Inventory):
         print("输入物品ID或名称进行搜索（输入 q 退出）")
 
         while True:
@@ -1814,7 +1833,8 @@ class 背包:
             if search_term.lower() == "q":
                 break
 
-            if results := self.search_backpack(search_term, data):
+            # 同时匹配ID（精确匹配）和名称（模糊匹配）
+            if results := data.search(search_term):
                 print(f"\n{'ID':<5}{'物品名称':<10}{'数量':<8}")
                 print("--" * 20)
                 for item in results:
@@ -1822,3 +1842,7 @@ class 背包:
                 print()
             else:
                 print("未找到匹配物品")
+
+
+# 任务注册表
+MISSIONS = build_missions("other", globals(), _FUNC_NAME)
@@ -0,0 +1,110 @@
+"""
+本模块为大乐斗页面解析
+
+每个响应只切分一次，之后按文字查找链接、按标签查找数值都不再重新扫描整个HTML：
+    D.page.links("领取")：所有文字为"领取"的链接
+    D.page.value_after("当前效果：")：等价于 D.find(r"当前效果：(.*?)<")，不存在返回None
+    D.page.digits_after("战力：", required=True)：等价于 D.findall(r"战力：(\\d+)")[0]，不存在抛出异常
+"""
+
+import html as _html
+import re
+from urllib.parse import parse_qsl
+
+
+# 依次匹配链接、其它标签、文字
+_TOKEN = re.compile(r'<a [^>]*?href="([^"]*)"[^>]*>(.*?)</a>|(<[^>]*>)|([^<]+)', re.S)
+_LINE_BREAK = re.compile(r"<br\s*/?>|</?p>", re.S)
+_DIGITS = re.compile(r"\d+")
+
+
+class Page:
+    """
+    切分后的大乐斗页面
+    """
+
+    def __init__(self, html: str):
+        self.html = html
+        # 文字片段（不含标签，链接文字也是独立片段）
+        self.texts: list[str] = []
+        # 链接，字典包含 text、cmd、params、href
+        self._links: list[dict] = []
+        # 链接文字 -> 链接列表
+        self._links_by_text: dict[str, list[dict]] = {}
+        # 标签 -> 查找结果
+        self._values: dict[tuple[str, str], str | None] = {}
+        self._lines: list[str] | None = None
+        self._tokenize()
+
+    def _tokenize(self) -> None:
+        for href, link_text, _, text in _TOKEN.findall(self.html):
+            if href:
+                params = dict(parse_qsl(_html.unescape(href).split("?", 1)[-1]))
+                link = {
+                    "text": link_text,
+                    "cmd": params.get("cmd"),
+                    "params": params,
+                    "href": href,
+                }
+                self._links.append(link)
+                self._links_by_text.setdefault(link_text, []).append(link)
+                self.texts.append(link_text)
+            elif text:
+                self.texts.append(text)
+
+    @property
+    def lines(self) -> list[str]:
+        """
+        按 <br /> 和 <p> 切分后的行（含标签）
+        """
+        if self._lines is None:
+            self._lines = [i for i in _LINE_BREAK.split(self.html) if i.strip()]
+        return self._lines
+
+    def links(self, text: str | None = None, cmd: str | None = None) -> list[dict]:
+        """
+        返回文字为 text 且 cmd 相同的链接，参数为None时不过滤
+        """
+        links = self._links if text is None else self._links_by_text.get(text, [])
+        if cmd is None:
+            return links
+        return [i for i in links if i["cmd"] == cmd]
+
+    def _require(self, label: str, value: str | None, required: bool) -> str | None:
+        """
+        required 为True且未找到时抛出异常
+        """
+        if value is None and required:
+            raise ValueError(f"页面未找到：{label}")
+        return value
+
+    def value_after(self, label: str, required: bool = False) -> str | None:
+        """
+        返回首个 label 之后直到下一个标签之前的文字，不存在返回None（required 为True时抛出异常）
+        """
+        key = ("value", label)
+        if key not in self._values:
+            self._values[key] = None
+            for text in self.texts:
+                if (i := text.find(label)) != -1:
+                    self._values[key] = text[i + len(label) :]
+                    break
+        return self._require(label, self._values[key], required)
+
+    def digits_after(self, label: str, required: bool = False) -> str | None:
+        """
+        返回首个紧跟数字的 label 之后的数字，不存在返回None（required 为True时抛出异常）
+        """
+        key = ("digits", label)
+        if key not in self._values:
+            self._values[key] = None
+            for text in self.texts:
+                start = 0
+                while (i := text.find(label, start)) != -1:
+                    start = i + len(label)
+                    if _match := _DIGITS.match(text, start):
+                        self._values[key] = _match.group()
+                        break
+                if self._values[key] is not None:
+                    break
+        return self._require(label, self._values[key], required)
@@ -0,0 +1,209 @@
+"""
+本模块为任务请求成本统计
+
+开启后（python main.py --one --profile）每个账号运行结束时把每个任务的请求次数、耗时、
+冷却时间及消息数量写入 ./log/profile.sqlite3，只保留最近 KEEP_DAYS 天的记录
+
+查看最近7天（或N天）每个任务的 p50/p95 成本：
+python main.py --stats
+python main.py --stats 30
+"""
+
+import math
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator
+
+
+PROFILE_PATH = Path("./log/profile.sqlite3")
+# 数据库保留天数
+KEEP_DAYS = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS missions (
+    day TEXT NOT NULL,
+    ts REAL NOT NULL,
+    qq TEXT NOT NULL,
+    round TEXT NOT NULL,
+    mission TEXT NOT NULL,
+    requests INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    sleep REAL NOT NULL,
+    messages INTEGER NOT NULL,
+    failed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS missions_day ON missions (day);
+"""
+
+# 是否记录任务成本
+_enabled = False
+_lock = threading.Lock()
+
+
+def enable_profiling() -> None:
+    """
+    开启任务成本统计
+    """
+    global _enabled
+    _enabled = True
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+@contextmanager
+def _connect(path: Path) -> Iterator[sqlite3.Connection]:
+    """
+    打开数据库，退出时提交并关闭
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(_SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def record(qq: str, round_name: str, rows: list[dict], path: Path = PROFILE_PATH):
+    """
+    写入单个账号一轮的任务成本，并删除超过保留天数的记录
+    """
+    today = date.today()
+    now = time.time()
+    expired = (today - timedelta(days=KEEP_DAYS)).isoformat()
+    with _lock, _connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO missions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    today.isoformat(),
+                    now,
+                    qq,
+                    round_name,
+                    r["mission"],
+                    r["requests"],
+                    r["seconds"],
+                    r["sleep"],
+                    r["messages"],
+                    int(r["failed"]),
+                )
+                for r in rows
+            ],
+        )
+        conn.execute("DELETE FROM missions WHERE day < ?", (expired,))
+
+
+def _percentile(values: list[float], p: float) -> float:
+    """
+    返回已排序列表的 p 分位数（最近秩）
+    """
+    index = max(0, min(len(values) - 1, math.ceil(p * len(values)) - 1))
+    return values[index]
+
+
+def round_estimates(
+    round_name: str, days: int = 7, path: Path = PROFILE_PATH
+) -> dict[str, tuple[int, float]]:
+    """
+    返回最近 days 天每个账号该轮每天的 p50 请求次数及运行耗时（不含冷却）：
+    {QQ: (请求次数, 秒数)}，没有记录返回空字典
+    """
+    if not path.exists():
+        return {}
+    since = (date.today() - timedelta(days=days - 1)).isoformat()
+    totals: dict[str, list[tuple[int, float]]] = {}
+    with _connect(path) as conn:
+        rows = conn.execute(
+            "SELECT qq, SUM(requests), SUM(seconds) FROM missions "
+            "WHERE round = ? AND day >= ? GROUP BY qq, day",
+            (round_name, since),
+        )
+        for qq, requests, seconds in rows:
+            totals.setdefault(qq, []).append((requests, seconds))
+    return {
+        qq: (
+            _percentile(sorted(i[0] for i in items), 0.5),
+            _percentile(sorted(i[1] for i in items), 0.5),
+        )
+        for qq, items in totals.items()
+    }
+
+
+def print_stats(days: int = 7, path: Path = PROFILE_PATH) -> None:
+    """
+    打印最近 days 天每个任务的运行次数及 p50/p95 请求次数、耗时，按 p95 请求次数降序
+    """
+    if not path.exists():
+        print(f"{path} 不存在，请先运行：python main.py --one --profile")
+        return
+
+    since = (date.today() - timedelta(days=days - 1)).isoformat()
+    data: dict[tuple[str, str], dict[str, list]] = {}
+    with _connect(path) as conn:
+        rows = conn.execute(
+            "SELECT round, mission, requests, seconds, sleep, messages, failed "
+            "FROM missions WHERE day >= ?",
+            (since,),
+        )
+        for round_name, mission, requests, seconds, sleep, messages, failed in rows:
+            item = data.setdefault(
+                (round_name, mission),
+                {
+                    "requests": [],
+                    "seconds": [],
+                    "sleep": [],
+                    "messages": [],
+                    "failed": 0,
+                },
+            )
+            item["requests"].append(requests)
+            item["seconds"].append(seconds)
+            item["sleep"].append(sleep)
+            item["messages"].append(messages)
+            item["failed"] += failed
+
+    if not data:
+        print(f"最近 {days} 天没有任务统计记录")
+        return
+
+    table = []
+    for (round_name, mission), item in data.items():
+        requests = sorted(item["requests"])
+        seconds = sorted(item["seconds"])
+        table.append(
+            (
+                round_name,
+                mission,
+                len(requests),
+                _percentile(requests, 0.5),
+                _percentile(requests, 0.95),
+                _percentile(seconds, 0.5),
+                _percentile(seconds, 0.95),
+                sum(item["sleep"]) / len(requests),
+                sum(item["messages"]) / len(requests),
+                item["failed"],
+            )
+        )
+    table.sort(key=lambda i: (i[4], i[6]), reverse=True)
+
+    print("--" * 20)
+    print(f"最近 {days} 天任务成本（按 p95 请求次数降序）")
+    print(
+        f"{'轮次':<5}{'任务':<12}{'次数':>5}{'请求p50':>8}{'请求p95':>8}"
+        f"{'耗时p50':>8}{'耗时p95':>8}{'冷却':>7}{'消息':>6}{'异常':>5}"
+    )
+    for r in table:
+        print(
+            f"{r[0]:<5}{r[1]:<12}{r[2]:>5}{r[3]:>8}{r[4]:>8}"
+            f"{r[5]:>8.2f}{r[6]:>8.2f}{r[7]:>7.1f}{r[8]:>6.1f}{r[9]:>5}"
+        )
+    total = sum(r[3] for r in table)
+    print("--" * 20)
+    print(f"每个账号每天预计请求（p50 合计）：{total}")
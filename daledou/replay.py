@@ -0,0 +1,159 @@
+"""
+本模块为大乐斗请求录制与回放
+
+录制：python main.py --one --record
+    每个账号的请求及响应按顺序保存到 ./fixtures/QQ.jsonl
+
+回放：ReplayTransport 按请求参数依次返回录制的响应，同一参数的响应用完后重复最后一个，
+用于离线运行任务函数（见 daledou/bench.py）
+"""
+
+import json
+from pathlib import Path
+
+from daledou.transport import cut_at
+
+
+# 默认录制目录
+FIXTURES_DIR = Path("./fixtures")
+
+# 录制目录，为None时不录制
+_record_dir: Path | None = None
+
+
+def enable_recording(path: Path = FIXTURES_DIR) -> None:
+    """
+    开启录制，之后登录的账号请求都会保存到 path 目录
+    """
+    global _record_dir
+    _record_dir = path
+
+
+def get_params(url: str) -> str:
+    """
+    返回url中 ? 之后的请求参数
+    """
+    return url.split("?", 1)[-1]
+
+
+class FixtureStore:
+    """
+    单个账号的录制文件
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        # 请求参数 -> 响应列表
+        self._responses: dict[str, list[str]] = {}
+        # 请求参数 -> 下一个响应的索引
+        self._cursor: dict[str, int] = {}
+        # 未录制的请求参数
+        self.misses: list[str] = []
+
+    def load(self) -> "FixtureStore":
+        """
+        读取录制文件
+        """
+        with self.path.open("r", encoding="utf-8") as fp:
+            for line in fp:
+                item = json.loads(line)
+                self._responses.setdefault(item["params"], []).append(item["html"])
+        return self
+
+    def append(self, params: str, html: str) -> None:
+        """
+        追加一条录制记录
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as fp:
+            item = {"params": params, "html": html}
+            fp.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+    def next(self, params: str) -> str:
+        """
+        返回请求参数对应的下一个响应，未录制返回空字符串
+        """
+        responses = self._responses.get(params)
+        if not responses:
+            self.misses.append(params)
+            return ""
+        i = self._cursor.get(params, 0)
+        self._cursor[params] = i + 1
+        return responses[min(i, len(responses) - 1)]
+
+    def rewind(self) -> None:
+        """
+        所有请求参数从第一个响应重新开始
+        """
+        self._cursor.clear()
+        self.misses.clear()
+
+
+class RecordingTransport:
+    """
+    录制请求及响应，实际请求交给被包装的传输
+    """
+
+    def __init__(self, transport, store: FixtureStore):
+        self._transport = transport
+        self._store = store
+
+    @property
+    def backend(self) -> str:
+        return f"record+{self._transport.backend}"
+
+    async def fetch(
+        self, url: str, allow_redirects: bool = True, stop: str | None = None
+    ) -> str:
+        html = await self._transport.fetch(url, allow_redirects, stop)
+        self._store.append(get_params(url), html)
+        return html
+
+    def get(
+        self, url: str, allow_redirects: bool = True, stop: str | None = None
+    ) -> str:
+        html = self._transport.get(url, allow_redirects, stop)
+        self._store.append(get_params(url), html)
+        return html
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class ReplayTransport:
+    """
+    回放录制的响应，不发送任何网络请求
+    """
+
+    def __init__(self, store: FixtureStore):
+        self._store = store
+        # 已回放的请求次数
+        self.requests = 0
+
+    @property
+    def backend(self) -> str:
+        return "replay"
+
+    async def fetch(
+        self, url: str, allow_redirects: bool = True, stop: str | None = None
+    ) -> str:
+        self.requests += 1
+        return cut_at(self._store.next(get_params(url)), stop)
+
+    def get(
+        self, url: str, allow_redirects: bool = True, stop: str | None = None
+    ) -> str:
+        self.requests += 1
+        return cut_at(self._store.next(get_params(url)), stop)
+
+    def close(self) -> None:
+        pass
+
+
+def wrap_recording(transport, qq: str):
+    """
+    开启录制时返回录制传输，否则原样返回
+    """
+    if _record_dir is None:
+        return transport
+    return RecordingTransport(transport, FixtureStore(_record_dir / f"{qq}.jsonl"))
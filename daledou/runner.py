@@ -0,0 +1,570 @@
+"""
+本模块为第一轮和第二轮任务共用的多账号运行引擎
+
+账号较多时可在 settings.yaml 中配置并发：
+    MAX_WORKERS：同时运行的账号数量，默认 1（依次运行）
+    HOST_CONCURRENCY：所有账号对同一域名同时进行中的请求数量上限，默认 4
+    STAGGER_WINDOW：定时运行时账号错峰启动的时间窗口分钟数，默认 0（同时启动）
+
+错峰启动时每个账号按QQ哈希固定落在窗口内的某一秒，每天启动顺序不变，
+启动前按任务估算请求次数打印每分钟的预计请求量
+
+每个账号在各自的线程中登录并运行任务，任务模块中的 D 指向该线程绑定的实例，
+日志只写入该账号自己的日志文件，全部账号结束后打印一份汇总
+"""
+
+import hashlib
+import heapq
+import inspect
+import itertools
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Iterator
+
+from loguru import logger
+
+from daledou import (
+    FUNC_NAMES,
+    REQUEST_BUDGET,
+    RESOURCES,
+    ROUNDS,
+    START_AFTER,
+    get_missions,
+    profiler,
+)
+from daledou.checkpoint import Checkpoint
+from daledou.utils import (
+    PATTERNS,
+    DaLeDou,
+    RequestBudgetExceeded,
+    SessionRegistry,
+    bind_dld,
+    create_dld_object,
+    get_qq,
+    get_request_budget,
+    push,
+    read_setting,
+    read_yaml,
+    setup_console_logger,
+)
+
+
+class Mission:
+    """
+    任务注册信息
+
+    某天是否运行只由 daledou.ROUNDS 的任务开关（get_missions）决定，注册表不重复保存
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable,
+        cost: int,
+        shared: bool,
+        start_after: str | None = None,
+        budget: int | None = None,
+        resource: str | None = None,
+    ):
+        # 函数名称
+        self.name = name
+        self.func = func
+        # 估算请求次数（源码中 D.get 调用次数，循环按一次计）
+        self.cost = cost
+        # 是否通过模块级 D 访问当前线程绑定的实例，否则以参数 D 调用
+        self.shared = shared
+        # 最早运行时间 HH:MM，为None时不限制
+        self.start_after = start_after
+        # 请求次数上限，为None时使用 settings.yaml 中的 REQUEST_BUDGET
+        self.budget = budget
+        # 独占的服务器状态（例如 towerfight），为None时可与任何任务交错运行
+        self.resource = resource
+
+    def run(self, D: DaLeDou):
+        """
+        运行任务，生成器任务返回生成器
+        """
+        return self.func() if self.shared else self.func(D)
+
+    def steps(self, D: DaLeDou) -> Iterator[float]:
+        """
+        以生成器运行任务：普通任务一次运行完，生成器任务每次 yield 需要冷却的秒数
+        """
+        ret = self.run(D)
+        if inspect.isgenerator(ret):
+            yield from ret
+
+
+def _estimate_cost(func: Callable, namespace: dict, seen: set) -> int:
+    """
+    返回函数（或类）及其调用的同模块函数源码中 .get( 的出现次数
+    """
+    if func in seen:
+        return 0
+    seen.add(func)
+    try:
+        cost = inspect.getsource(func).count("D.get(")
+    except (OSError, TypeError):
+        return 0
+    if not inspect.isfunction(func):
+        return cost
+    for name in func.__code__.co_names:
+        called = namespace.get(name)
+        if inspect.isfunction(called):
+            cost += _estimate_cost(called, namespace, seen)
+    return cost
+
+
+def build_missions(
+    round_name: str, namespace: dict, names: list | None = None
+) -> dict[str, Mission]:
+    """
+    根据任务开关为模块中的任务函数建立注册表，键为函数名称
+
+    names 为空时使用 ROUNDS 中该轮的任务；任务在模块中不存在时直接报错，
+    other 模式的任务可以是类（实例化即运行）
+    """
+    missions = {}
+    for mission_name in ROUNDS[round_name] if names is None else names:
+        name = FUNC_NAMES.get(mission_name, mission_name)
+        func = namespace.get(name)
+        if not (inspect.isfunction(func) or inspect.isclass(func)):
+            raise KeyError(f"{round_name} 模块缺少任务函数：{name}")
+        missions[name] = Mission(
+            name=name,
+            func=func,
+            cost=max(1, _estimate_cost(func, namespace, set())),
+            shared=not inspect.signature(func).parameters,
+            start_after=START_AFTER.get(mission_name),
+            budget=REQUEST_BUDGET.get(mission_name),
+            resource=RESOURCES.get(mission_name),
+        )
+    return missions
+
+
+def check_missions(round_name: str, missions: dict, names: list | None) -> bool:
+    """
+    检查命令行任务名称是否存在，存在不支持的名称时打印支持的名称并返回False
+    """
+    unknown = [i for i in names or [] if i not in missions]
+    if not unknown:
+        return True
+    print(f"{round_name} 模式不支持：{'、'.join(unknown)}")
+    print(f"{round_name} 模式支持以下参数：")
+    for name in missions:
+        print(name)
+    print("--" * 20)
+    return False
+
+
+class AccountResult:
+    """
+    单个账号的运行结果
+    """
+
+    def __init__(self, qq: str | None):
+        self.qq = qq
+        # 完成、Cookie无效、首页未找到、初始化异常
+        self.status: str = "完成"
+        # 已运行任务数量
+        self.missions: int = 0
+        # 出现异常的任务名称
+        self.failed: list[str] = []
+        # 账号运行耗时（含登录）
+        self.seconds: float = 0
+        # 每个任务的请求次数、耗时、冷却时间及消息数量，开启任务统计时写入数据库
+        self.profile: list[dict] = []
+
+
+def _seconds_until(start_after: str | None) -> float:
+    """
+    返回距今天 start_after（HH:MM）的秒数，已过或不限制返回0
+    """
+    if start_after is None:
+        return 0
+    hour, minute = map(int, start_after.split(":"))
+    now = datetime.now()
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return max((target - now).total_seconds(), 0)
+
+
+def _order_missions(
+    D: DaLeDou, func_name_list: list, missions: dict, wait: bool
+) -> Iterator[str]:
+    """
+    未到最早运行时间的任务推迟到最后；wait 为True时等待到点，否则跳过
+    """
+    ready, deferred = [], []
+    for func_name in func_name_list:
+        if _seconds_until(missions[func_name].start_after):
+            deferred.append(func_name)
+        else:
+            ready.append(func_name)
+    deferred.sort(key=lambda i: missions[i].start_after)
+
+    yield from ready
+    for func_name in deferred:
+        start_after = missions[func_name].start_after
+        if (seconds := _seconds_until(start_after)) and not wait:
+            D.print_info(f"未到最早运行时间 {start_after}，本次跳过", func_name)
+            continue
+        if seconds:
+            D.print_info(f"等待到 {start_after} 运行，{int(seconds)} s", func_name)
+            time.sleep(seconds)
+        yield func_name
+
+
+def run_missions(
+    D: DaLeDou,
+    func_name_list: list,
+    missions: dict,
+    result: AccountResult,
+    wait: bool = False,
+    checkpoint: Checkpoint | None = None,
+) -> None:
+    """
+    依次运行任务，单个任务出现异常不影响后续任务
+
+    设置了最早运行时间（START_AFTER）的任务未到时间时推迟到最后，wait 为True时等待到点；
+    传入 checkpoint 时每完成一个任务写入断点记录
+
+    生成器任务 yield 冷却秒数时暂停该任务，先运行后续任务，冷却结束后再继续，
+    全部任务运行完仍有冷却中的任务时等待其冷却结束；
+    与暂停中的任务持有相同独占状态（RESOURCES）的任务排队，等该任务结束后再运行
+    """
+    # 冷却中的任务：(恢复时间戳, 序号, 任务名称, 生成器, 页面, 消息)
+    parked: list[tuple[float, int, str, Iterator, str, list]] = []
+    seq = itertools.count()
+    # 独占状态 -> 持有该状态且尚未结束的任务名称
+    held: dict[str, str] = {}
+    # 等待独占状态释放的任务名称，按原有顺序
+    queued: list[str] = []
+    # 任务名称 -> 运行耗时（不含冷却）、冷却秒数
+    elapsed: dict[str, list[float]] = {}
+
+    def finish(func_name: str, messages: int, failed: bool):
+        """
+        记录任务结束
+        """
+        seconds, sleep = elapsed.pop(func_name)
+        if (resource := missions[func_name].resource) is not None:
+            held.pop(resource, None)
+        result.missions += 1
+        result.profile.append(
+            {
+                "mission": func_name,
+                "requests": D.stats.count(func_name),
+                "seconds": seconds,
+                "sleep": sleep,
+                "messages": messages,
+                "failed": failed,
+            }
+        )
+        if failed:
+            result.failed.append(func_name)
+        elif checkpoint is not None:
+            checkpoint.mark(func_name)
+
+    def advance(func_name: str, steps: Iterator, html: str, messages: list):
+        """
+        运行任务直到结束或者让出冷却，冷却中的任务暂存其页面和消息
+        """
+        D.func_name = func_name
+        D.request_budget = get_request_budget(func_name, missions[func_name].budget)
+        D.html = html
+        start = len(D.msg)
+        D.msg.extend(messages)
+        timer = elapsed.setdefault(func_name, [0, 0])
+        begin = time.perf_counter()
+        seconds = None
+        try:
+            seconds = next(steps)
+        except StopIteration:
+            failed = False
+        except RequestBudgetExceeded as e:
+            logger.warning(f"{D.qq} | {func_name}：{e}")
+            D.msg_append(f"{e}，详情查看日志")
+            failed = True
+        except Exception as e:
+            D.print_info(f"出现异常，本任务结束：{e}")
+            D.msg_append("出现异常，本任务结束，详情查看日志")
+            failed = True
+        timer[0] += time.perf_counter() - begin
+
+        if seconds is None:
+            finish(func_name, len(D.msg) - start - 1, failed)
+        else:
+            timer[1] += seconds
+            # 冷却期间先运行其它任务，消息在任务结束时再写入，保持同一任务的消息连续
+            messages = D.msg[start:]
+            del D.msg[start:]
+            item = (time.time() + seconds, next(seq), func_name, steps, D.html)
+            heapq.heappush(parked, (*item, messages))
+
+    def start(func_name: str):
+        """
+        开始运行任务，独占状态被暂停中的任务持有时排队
+        """
+        resource = missions[func_name].resource
+        if resource is not None:
+            if resource in held:
+                D.print_info(f"等待 {held[resource]} 结束后运行", func_name)
+                queued.append(func_name)
+                return
+            held[resource] = func_name
+        print("--" * 20)
+        steps = missions[func_name].steps(D)
+        advance(func_name, steps, D.html, [f"\n【{func_name}】"])
+
+    def start_queued():
+        """
+        运行独占状态已释放的排队任务
+        """
+        for func_name in list(queued):
+            if missions[func_name].resource not in held:
+                queued.remove(func_name)
+                start(func_name)
+
+    def resume(block: bool):
+        """
+        恢复冷却结束的任务，block 为True时等待最早的任务冷却结束
+        """
+        while parked and (block or parked[0][0] <= time.time()):
+            resume_at, _, func_name, steps, html, messages = heapq.heappop(parked)
+            if (seconds := resume_at - time.time()) > 0:
+                time.sleep(seconds)
+            advance(func_name, steps, html, messages)
+            start_queued()
+
+    for func_name in _order_missions(D, func_name_list, missions, wait):
+        resume(block=False)
+        start(func_name)
+    resume(block=True)
+    D.run_time()
+
+
+def _run_account(
+    cookie: str,
+    round_name: str,
+    missions: dict,
+    unknown_args: list | None,
+    registry: SessionRegistry | None,
+    start_at: float = 0,
+) -> AccountResult:
+    """
+    登录单个账号并运行任务，返回运行结果
+
+    start_at 为错峰启动的时间戳，未到时间先等待再登录
+    """
+    result = AccountResult(get_qq(cookie))
+    if (wait := start_at - time.time()) > 0:
+        logger.info(f"{result.qq} | 错峰启动，等待 {int(wait)} s")
+        time.sleep(wait)
+    start = time.time()
+
+    with logger.contextualize(qq=result.qq):
+        try:
+            dld, D = create_dld_object(cookie, registry)
+        except Exception as e:
+            logger.error(f"{result.qq} | 初始化异常：{e}")
+            result.status = "初始化异常"
+            return result
+
+    if D is None:
+        result.status = "Cookie无效" if dld.session is None else "首页未找到"
+        if registry is not None:
+            # 下次运行重新验证Cookie
+            registry.invalidate(dld.qq)
+        dld.close()
+        result.seconds = time.time() - start
+        return result
+
+    with bind_dld(D):
+        checkpoint = None
+        if unknown_args:
+            func_name_list = unknown_args
+            is_push = False
+        else:
+            # 完整运行时跳过当天已完成的任务
+            checkpoint = Checkpoint(D.qq, round_name)
+            func_name_list = checkpoint.remaining(D.func_map[round_name])
+            if skipped := len(D.func_map[round_name]) - len(func_name_list):
+                D.print_info(f"断点续跑，跳过今天已完成的 {skipped} 个任务", "断点记录")
+                D.msg_append(f"断点续跑：跳过今天已完成的 {skipped} 个任务")
+            is_push = True
+
+        run_missions(D, func_name_list, missions, result, start_at > 0, checkpoint)
+        if profiler.is_enabled():
+            profiler.record(D.qq, round_name, result.profile)
+
+        print("--" * 20)
+        if is_push:
+            # pushplus微信推送消息
+            push(f"{D.qq} {round_name}", D.msg_join)
+        else:
+            print("--------------模拟微信信息--------------")
+            print(D.msg_join)
+        print("--" * 20)
+
+    if registry is not None and result.failed:
+        # 出现异常时下次运行重新验证Cookie
+        registry.invalidate(D.qq)
+    dld.close()
+    result.seconds = time.time() - start
+    return result
+
+
+def _log_summary(round_name: str, results: list[AccountResult], seconds: float):
+    """
+    打印所有账号的汇总信息
+    """
+    success = sum(1 for r in results if r.status == "完成")
+    print("--" * 20)
+    logger.success(
+        f"【{round_name} 汇总】账号：{len(results)}，完成：{success}，"
+        f"未完成：{len(results) - success}，总耗时：{int(seconds)} s"
+    )
+    for r in results:
+        failed = f"，异常任务：{'、'.join(r.failed)}" if r.failed else ""
+        logger.info(
+            f"{r.qq} | {r.status}，任务数：{r.missions}，耗时：{int(r.seconds)} s{failed}"
+        )
+    stats = PATTERNS.stats()
+    logger.info(
+        f"正则缓存：{stats['size']} 个，命中 {stats['hits']} 次，编译 {stats['misses']} 次"
+    )
+    print("--" * 20)
+
+
+def stagger_offset(qq: str | None, window: float) -> float:
+    """
+    返回QQ在错峰窗口内的固定偏移秒数，同一QQ每次结果相同
+    """
+    if not window or qq is None:
+        return 0
+    digest = hashlib.sha1(qq.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % int(window)
+
+
+def _spread(start: float, requests: float, seconds: float) -> dict[int, float]:
+    """
+    将请求次数按运行耗时均匀分摊到每分钟，返回 {分钟时间戳: 请求次数}
+    """
+    minute = int(start // 60) * 60
+    if seconds <= 0:
+        return {minute: requests}
+    end = start + seconds
+    result = {}
+    while minute < end:
+        overlap = min(minute + 60, end) - max(minute, start)
+        result[minute] = requests * overlap / seconds
+        minute += 60
+    return result
+
+
+def _log_stagger_plan(
+    round_name: str, missions: dict[str, Mission], start_at: dict[str, float]
+):
+    """
+    打印错峰启动计划：每分钟启动的账号数量及预计请求次数
+
+    有任务成本记录（--profile）时将每个账号的 p50 请求次数按其 p50 运行耗时分摊到每分钟，
+    没有记录的账号使用其它账号的中位数；完全没有记录时只能打印每个账号的静态估算总数
+    """
+    print("--" * 20)
+    starts: dict[str, int] = {}
+    for timestamp in sorted(start_at.values()):
+        minute = datetime.fromtimestamp(timestamp).strftime("%H:%M")
+        starts[minute] = starts.get(minute, 0) + 1
+
+    estimates = profiler.round_estimates(round_name)
+    if not estimates:
+        # 源码中 D.get 调用次数，循环按一次计，只是下限
+        cost = sum(
+            missions[name].cost
+            for name in (FUNC_NAMES.get(i, i) for i in get_missions(round_name))
+            if name in missions
+        )
+        logger.info(
+            f"【{round_name} 错峰启动】账号：{len(start_at)}，"
+            f"每个账号至少请求 {cost} 次（静态估算，使用 --profile 记录后按分钟估算）"
+        )
+        for minute, accounts in starts.items():
+            logger.info(f"{minute} | 启动 {accounts} 个账号")
+        print("--" * 20)
+        return
+
+    default = (
+        statistics.median(i[0] for i in estimates.values()),
+        statistics.median(i[1] for i in estimates.values()),
+    )
+    rate: dict[int, float] = {}
+    for cookie, timestamp in start_at.items():
+        requests, seconds = estimates.get(get_qq(cookie), default)
+        for minute, n in _spread(timestamp, requests, seconds).items():
+            rate[minute] = rate.get(minute, 0) + n
+
+    logger.info(
+        f"【{round_name} 错峰启动】账号：{len(start_at)}，"
+        f"预计请求按最近7天 p50 请求次数及运行耗时估算"
+    )
+    for minute in sorted(rate):
+        label = datetime.fromtimestamp(minute).strftime("%H:%M")
+        started = f"启动 {starts[label]} 个账号，" if label in starts else ""
+        logger.info(f"{label} | {started}预计 {rate[minute]:.0f} 次/分")
+    logger.info(f"预计请求峰值：{max(rate.values()):.0f} 次/分")
+    print("--" * 20)
+
+
+def run_round(
+    round_name: str,
+    missions: dict[str, Mission],
+    unknown_args: list = None,
+    registry: SessionRegistry | None = None,
+    stagger: bool = False,
+) -> list[AccountResult] | None:
+    """
+    并发运行所有账号的某一轮任务
+
+    Args:
+        round_name：轮次名称，对应 func_map 的键（one、two）
+        missions：任务注册表，由 build_missions 建立
+        unknown_args：命令行指定的任务名称，为空时运行首页过滤后的全部任务
+        registry：定时守护进程的Session缓存，为空时每次重新验证Cookie
+        stagger：是否在 STAGGER_WINDOW 窗口内错峰启动各账号
+    """
+    # 登录之前检查命令行任务名称
+    if not check_missions(round_name, missions, unknown_args):
+        return None
+
+    start = time.time()
+    setup_console_logger()
+    dld_cookies: list[str] = read_yaml("settings.yaml", "DALEDOU_ACCOUNT")
+    max_workers: int = read_setting("MAX_WORKERS", 1)
+    window: float = read_setting("STAGGER_WINDOW", 0) * 60 if stagger else 0
+
+    # 错峰启动时间戳，按启动先后排序，依次运行时也按槽位顺序启动
+    start_at = {c: start + stagger_offset(get_qq(c), window) for c in dld_cookies}
+    if window:
+        dld_cookies = sorted(dld_cookies, key=start_at.get)
+        _log_stagger_plan(round_name, missions, start_at)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(
+            executor.map(
+                lambda cookie: _run_account(
+                    cookie,
+                    round_name,
+                    missions,
+                    unknown_args,
+                    registry,
+                    start_at[cookie] if window else 0,
+                ),
+                dld_cookies,
+            )
+        )
+
+    _log_summary(round_name, results, time.time() - start)
+    return results
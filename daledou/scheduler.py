@@ -0,0 +1,115 @@
+"""
+本模块为定时守护进程的调度器
+
+不再每秒轮询：计算距下一个任务的秒数后等待到点，等待期间可被信号唤醒
+    SIGHUP：重新读取 settings.yaml 中的运行时间（Windows 不支持该信号）
+    系统休眠唤醒后错过的任务：超过 MISSED_RUN_GRACE 秒不再补跑，顺延到下一次
+
+为及时发现休眠导致的系统时间跳变，单次等待至多 MAX_SLEEP 秒
+
+信号处理函数只设置标记，由 signal.set_wakeup_fd 写入的字节唤醒等待中的 select，
+不在信号处理函数中使用任何锁
+"""
+
+import select
+import signal
+import socket
+from datetime import datetime
+from typing import Callable
+
+from loguru import logger
+from schedule import Job, Scheduler
+
+
+# 单次等待的最大秒数
+MAX_SLEEP = 300
+
+
+class Daemon:
+    """
+    定时守护进程
+
+    Args:
+        jobs：返回 [(任务名称, 运行时间 HH:MM, 函数), ...]，启动及重新配置时调用
+        grace：错过运行时间超过该秒数则跳过本次
+    """
+
+    def __init__(
+        self,
+        jobs: Callable[[], list[tuple[str, str, Callable]]],
+        grace: float,
+    ):
+        self._jobs = jobs
+        self._grace = grace
+        self._scheduler = Scheduler()
+        # 任务 -> (任务名称, 运行时间, 函数)
+        self._specs: dict[Job, tuple[str, str, Callable]] = {}
+        # 收到信号时由解释器向 _writer 写入一个字节，唤醒等待 _reader 的 select
+        self._reader, self._writer = socket.socketpair()
+        self._reader.setblocking(False)
+        self._writer.setblocking(False)
+        self._reload = False
+
+    def _add(self, name: str, at: str, func: Callable) -> None:
+        job = self._scheduler.every().day.at(at).do(func)
+        self._specs[job] = (name, at, func)
+
+    def reload(self) -> None:
+        """
+        重新读取任务配置并计算下次运行时间
+        """
+        self._scheduler.clear()
+        self._specs.clear()
+        for name, at, func in self._jobs():
+            self._add(name, at, func)
+        for job, (name, at, _) in self._specs.items():
+            logger.info(f"{name} 每天 {at} 运行，下次运行：{job.next_run:%m-%d %H:%M}")
+
+    def _on_sighup(self, signum, frame) -> None:
+        self._reload = True
+
+    def _wait(self, timeout: float) -> None:
+        """
+        等待 timeout 秒，收到信号时提前返回
+        """
+        if select.select([self._reader], [], [], timeout)[0]:
+            try:
+                while self._reader.recv(64):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def _skip_missed(self) -> None:
+        """
+        跳过错过太久的任务，按原运行时间顺延
+        """
+        now = datetime.now()
+        for job, spec in list(self._specs.items()):
+            if (now - job.next_run).total_seconds() > self._grace:
+                name, at, func = spec
+                logger.warning(
+                    f"{name} 错过运行时间 {job.next_run:%m-%d %H:%M}（可能系统休眠），本次跳过"
+                )
+                self._scheduler.cancel_job(job)
+                del self._specs[job]
+                self._add(name, at, func)
+
+    def run_forever(self) -> None:
+        """
+        运行到点的任务，然后等待到下一个任务的运行时间
+        """
+        if hasattr(signal, "SIGHUP"):
+            signal.set_wakeup_fd(self._writer.fileno())
+            signal.signal(signal.SIGHUP, self._on_sighup)
+        self.reload()
+        while True:
+            if self._reload:
+                self._reload = False
+                logger.info("收到 SIGHUP，重新读取定时配置")
+                self.reload()
+            self._skip_missed()
+            self._scheduler.run_pending()
+
+            idle = self._scheduler.idle_seconds
+            timeout = MAX_SLEEP if idle is None else min(max(idle, 0), MAX_SLEEP)
+            self._wait(timeout)
@@ -0,0 +1,180 @@
+"""
+本模块为本地大乐斗模拟服务器，用于并发及限速调优，不会访问官方服务器
+
+启动：
+python -m daledou.server --port 8000 --latency 0.05 --busy 0.05 --frequent 0.02
+
+然后修改 config/settings.yaml：
+DALEDOU_BASE_URL: http://127.0.0.1:8000
+
+响应来源：
+    ./fixtures/QQ.jsonl 存在时按请求参数依次回放该QQ录制的页面（见 daledou/replay.py）
+    否则返回模板页面：首页包含全部任务名称，其它页面为空白页面
+
+每个Cookie（按 newuin 区分）单独记录回放进度和请求次数，访问 /stats 查看
+请求头包含 Accept-Encoding: gzip 时返回 gzip 压缩的响应
+"""
+
+import argparse
+import gzip
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from daledou import ONE, TWO
+from daledou.replay import FIXTURES_DIR, FixtureStore
+
+
+_INDEX_TEMPLATE = (
+    "<p>大乐斗<br />{missions}<br />"
+    '<a href="/qpet/cgi-bin/phonepk?cmd=store">商店</a><br />【退出】</p>'
+)
+_PAGE_TEMPLATE = "<p>模拟页面<br />{params}<br /></p>"
+_BUSY_TEMPLATE = "<p>{pushback}，请稍后再试<br /></p>"
+
+
+class _CookieState:
+    """
+    单个Cookie的模拟状态
+    """
+
+    def __init__(self, store: FixtureStore | None):
+        self.store = store
+        self.requests = 0
+        self.busy = 0
+        self.frequent = 0
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    大乐斗模拟服务器
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        fixtures_dir: Path = FIXTURES_DIR,
+        latency: float = 0.0,
+        busy: float = 0.0,
+        frequent: float = 0.0,
+    ):
+        super().__init__(address, _Handler)
+        self.fixtures_dir = fixtures_dir
+        # 每个请求的延迟秒数（上下浮动50%）
+        self.latency = latency
+        # 返回"系统繁忙"、"操作频繁"的概率
+        self.busy = busy
+        self.frequent = frequent
+        self._states: dict[str, _CookieState] = {}
+        self._lock = threading.Lock()
+
+    def state(self, qq: str) -> _CookieState:
+        """
+        返回QQ的模拟状态，首次请求时加载该QQ的录制文件
+        """
+        with self._lock:
+            if qq not in self._states:
+                path = self.fixtures_dir / f"{qq}.jsonl"
+                store = FixtureStore(path).load() if path.exists() else None
+                self._states[qq] = _CookieState(store)
+            return self._states[qq]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                qq: {"requests": i.requests, "busy": i.busy, "frequent": i.frequent}
+                for qq, i in self._states.items()
+            }
+
+    def respond(self, qq: str, params: str) -> str:
+        """
+        返回请求参数对应的页面
+        """
+        state = self.state(qq)
+        with self._lock:
+            state.requests += 1
+            roll = random.random()
+            if roll < self.busy:
+                state.busy += 1
+                return _BUSY_TEMPLATE.format(pushback="系统繁忙")
+            if roll < self.busy + self.frequent:
+                state.frequent += 1
+                return _BUSY_TEMPLATE.format(pushback="操作频繁")
+            if state.store is not None and (html := state.store.next(params)):
+                return html
+
+        if params == "cmd=index":
+            return _INDEX_TEMPLATE.format(missions="<br />".join({**ONE, **TWO}))
+        return _PAGE_TEMPLATE.format(params=params)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StubServer
+
+    def do_GET(self):
+        if latency := self.server.latency:
+            time.sleep(latency * random.uniform(0.5, 1.5))
+
+        if self.path == "/stats":
+            body = json.dumps(self.server.stats(), ensure_ascii=False)
+            content_type = "application/json; charset=utf-8"
+        elif self.path.startswith("/qpet/cgi-bin/phonepk"):
+            cookie = self.headers.get("Cookie", "")
+            qq = (
+                result.group(1)
+                if (result := re.search(r"newuin=(\d+)", cookie))
+                else ""
+            )
+            body = self.server.respond(qq, self.path.split("?", 1)[-1])
+            content_type = "text/html; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+
+        data = body.encode("utf-8")
+        self.send_response(200)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            data = gzip.compress(data)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地大乐斗模拟服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_DIR, help="录制目录")
+    parser.add_argument("--latency", type=float, default=0.0, help="请求延迟秒数")
+    parser.add_argument("--busy", type=float, default=0.0, help="系统繁忙概率")
+    parser.add_argument("--frequent", type=float, default=0.0, help="操作频繁概率")
+    args = parser.parse_args()
+
+    server = StubServer(
+        (args.host, args.port), args.fixtures, args.latency, args.busy, args.frequent
+    )
+    print(f"模拟服务器已启动：http://{args.host}:{args.port}")
+    print(
+        f"修改 config/settings.yaml：DALEDOU_BASE_URL: http://{args.host}:{args.port}"
+    )
+    print("强制结束按键：CTRL + C")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+本模块为大乐斗请求统计
+
+DaLeDou.get 每次请求记录 cmd、耗时、响应大小、重试次数及繁忙标记，按任务（D.func_name）汇总，
+账号结束时按总耗时降序打印任务热点，settings.yaml 中 REQUEST_STATS_JSON 为 true 时另存为JSON文件
+"""
+
+import json
+from pathlib import Path
+
+
+# 耗时分桶上限（秒）
+_BUCKETS = [0.1, 0.25, 0.5, 1, 2, 5]
+
+
+class _Histogram:
+    """
+    单个任务（或 cmd）的请求统计
+    """
+
+    def __init__(self):
+        self.count = 0
+        # 总耗时（含限速等待和重试）
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        # 响应内容总字符数
+        self.size = 0
+        self.retries = 0
+        self.busy = 0
+        self.frequent = 0
+        # 与 _BUCKETS 对应，最后一个为超过最大分桶的数量
+        self.buckets = [0] * (len(_BUCKETS) + 1)
+
+    def add(self, seconds: float, size: int, retries: int, busy: int, frequent: int):
+        self.count += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.size += size
+        self.retries += retries
+        self.busy += busy
+        self.frequent += frequent
+        for i, limit in enumerate(_BUCKETS):
+            if seconds <= limit:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "seconds": round(self.seconds, 3),
+            "avg_seconds": round(self.seconds / self.count, 3) if self.count else 0,
+            "max_seconds": round(self.max_seconds, 3),
+            "size": self.size,
+            "retries": self.retries,
+            "busy": self.busy,
+            "frequent": self.frequent,
+            "buckets": dict(
+                zip([f"<={i}s" for i in _BUCKETS] + [f">{_BUCKETS[-1]}s"], self.buckets)
+            ),
+        }
+
+
+class RequestStats:
+    """
+    单个账号的请求统计，只在请求事件循环中写入
+    """
+
+    def __init__(self):
+        # 任务名称 -> 统计
+        self._missions: dict[str, _Histogram] = {}
+        # 任务名称 -> cmd -> 统计
+        self._cmds: dict[str, dict[str, _Histogram]] = {}
+
+    def record(
+        self,
+        mission: str | None,
+        cmd: str,
+        seconds: float,
+        size: int,
+        retries: int,
+        busy: int,
+        frequent: int,
+    ) -> None:
+        """
+        记录一次请求（含重试）
+        """
+        mission = mission or "初始化"
+        if mission not in self._missions:
+            self._missions[mission] = _Histogram()
+            self._cmds[mission] = {}
+        self._missions[mission].add(seconds, size, retries, busy, frequent)
+        cmds = self._cmds[mission]
+        if cmd not in cmds:
+            cmds[cmd] = _Histogram()
+        cmds[cmd].add(seconds, size, retries, busy, frequent)
+
+    def count(self, mission: str) -> int:
+        """
+        返回任务的请求次数
+        """
+        hist = self._missions.get(mission)
+        return hist.count if hist else 0
+
+    def hot_list(self) -> list[tuple[str, _Histogram]]:
+        """
+        返回按总耗时降序排列的任务统计
+        """
+        return sorted(self._missions.items(), key=lambda i: i[1].seconds, reverse=True)
+
+    def to_dict(self) -> dict:
+        return {
+            name: {
+                **hist.to_dict(),
+                "cmds": {k: v.to_dict() for k, v in self._cmds[name].items()},
+            }
+            for name, hist in self.hot_list()
+        }
+
+    def dump_json(self, path: Path) -> None:
+        """
+        将统计结果保存为JSON文件
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as fp:
+            json.dump(self.to_dict(), fp, ensure_ascii=False, indent=2)
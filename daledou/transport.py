@@ -0,0 +1,222 @@
+"""
+本模块为大乐斗异步请求传输层
+
+所有账号的请求都在同一个后台事件循环中发送，同步的 DaLeDou.get 只是向该循环提交请求并等待结果，
+互不依赖的页面（例如商店积分）可以通过 DaLeDou.gather 同时发送
+
+已安装 httpx 时使用 httpx.AsyncClient（连接池保持长连接），
+否则在线程池中使用 requests.Session（同样复用长连接）
+
+请求协商 gzip 压缩；传入截止标记 stop 时流式读取，读到标记后只解码标记及之前的内容，
+标记之后剩余内容不超过 _DRAIN_BYTES 时读完丢弃以复用长连接，否则直接断开
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+# 请求头
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36 Edg/132.0.0.0",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+# 单个账号连接池大小
+_POOL_SIZE = 8
+# 流式读取的块大小（解压后）
+_CHUNK_SIZE = 8192
+# 读到截止标记后最多继续读取并丢弃的字节数
+_DRAIN_BYTES = 64 * 1024
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="daledou-http")
+
+# 每个域名同时进行中的请求上限，仅在事件循环线程中访问
+_host_semaphores: dict[str, asyncio.Semaphore] = {}
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    返回后台事件循环，首次调用时在守护线程中启动
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="daledou-loop", daemon=True
+            ).start()
+        return _loop
+
+
+def run_sync(coro):
+    """
+    在后台事件循环中运行协程并阻塞等待结果
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result()
+
+
+def _host_semaphore(url: str, limit: int) -> asyncio.Semaphore:
+    """
+    返回url所属域名的并发信号量，所有账号共用
+    """
+    host = url.split("/")[2]
+    if host not in _host_semaphores:
+        _host_semaphores[host] = asyncio.Semaphore(limit)
+    return _host_semaphores[host]
+
+
+def mount_pool(session: Session) -> Session:
+    """
+    为Session挂载更大的连接池，便于并发请求复用长连接
+    """
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def cut_at(html: str, stop: str | None) -> str:
+    """
+    返回截止标记及之前的内容，没有标记原样返回
+    """
+    if stop is None or (i := html.find(stop)) == -1:
+        return html
+    return html[: i + len(stop)]
+
+
+class _StopReader:
+    """
+    按块累积响应内容，读到截止标记后不再累积
+    """
+
+    def __init__(self, stop: str):
+        self._stop = stop.encode("utf-8")
+        self._buffer = bytearray()
+        # 截止标记结束位置
+        self._end: int | None = None
+        # 读到标记后丢弃的字节数
+        self._drained = 0
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        添加一块内容，返回True表示剩余内容过多，应停止读取并断开连接
+        """
+        if self._end is not None:
+            self._drained += len(chunk)
+            return self._drained > _DRAIN_BYTES
+        # 标记可能跨越两块，从上一块末尾开始查找
+        start = max(0, len(self._buffer) - len(self._stop) + 1)
+        self._buffer += chunk
+        if (i := self._buffer.find(self._stop, start)) != -1:
+            self._end = i + len(self._stop)
+        return False
+
+    def text(self) -> str:
+        return self._buffer[: self._end].decode("utf-8", errors="replace")
+
+
+def http_get(
+    session: Session, url: str, allow_redirects: bool = True, stop: str | None = None
+) -> str:
+    """
+    使用requests发送get请求，返回utf-8解码的响应内容
+    """
+    if stop is None:
+        res = session.get(url, headers=HEADERS, allow_redirects=allow_redirects)
+        res.encoding = "utf-8"
+        return res.text
+
+    reader = _StopReader(stop)
+    with session.get(
+        url, headers=HEADERS, allow_redirects=allow_redirects, stream=True
+    ) as res:
+        for chunk in res.iter_content(_CHUNK_SIZE):
+            if reader.feed(chunk):
+                break
+    return reader.text()
+
+
+class AsyncTransport:
+    """
+    单个账号的异步传输，Cookie取自该账号的Session
+    """
+
+    def __init__(self, session: Session, host_limit: int = 4):
+        self._session = mount_pool(session)
+        self._host_limit = host_limit
+        self._client = None
+
+    @property
+    def backend(self) -> str:
+        return "httpx" if httpx else "requests"
+
+    def _get_client(self):
+        """
+        返回httpx客户端，必须在事件循环线程中调用
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=HEADERS,
+                cookies=self._session.cookies,
+                limits=httpx.Limits(
+                    max_connections=_POOL_SIZE,
+                    max_keepalive_connections=_POOL_SIZE,
+                ),
+                timeout=30,
+            )
+        return self._client
+
+    async def fetch(
+        self, url: str, allow_redirects: bool = True, stop: str | None = None
+    ) -> str:
+        """
+        发送get请求，返回utf-8解码的响应内容，传入 stop 时只返回截止标记及之前的内容
+        """
+        async with _host_semaphore(url, self._host_limit):
+            if httpx is None:
+                return await asyncio.get_running_loop().run_in_executor(
+                    _executor,
+                    partial(http_get, self._session, url, allow_redirects, stop),
+                )
+            client = self._get_client()
+            if stop is None:
+                res = await client.get(url, follow_redirects=allow_redirects)
+                return res.content.decode("utf-8", errors="replace")
+
+            reader = _StopReader(stop)
+            async with client.stream(
+                "GET", url, follow_redirects=allow_redirects
+            ) as res:
+                async for chunk in res.aiter_bytes(_CHUNK_SIZE):
+                    if reader.feed(chunk):
+                        break
+            return reader.text()
+
+    def get(
+        self, url: str, allow_redirects: bool = True, stop: str | None = None
+    ) -> str:
+        """
+        同步发送get请求
+        """
+        return run_sync(self.fetch(url, allow_redirects, stop))
+
+    def close(self) -> None:
+        """
+        关闭连接池
+        """
+        if self._client is not None:
+            run_sync(self._client.aclose())
+            self._client = None
+        self._session.close()
@@ -11,7 +11,9 @@ python main.py --two 邪神秘宝
 python main.py --two 邪神秘宝 问鼎天下
 """
 
-from daledou.utils import push, yield_dld_objects
+from daledou.inventory import Inventory
+from daledou.runner import build_missions, run_round
+from daledou.utils import DaLeDouProxy, SessionRegistry
 from daledou.common import (
     c_邪神秘宝,
     c_问鼎天下,
@@ -25,37 +27,16 @@ from daledou.common import (
 )
 
 
-def run_two(unknown_args: list = None):
-    global D
-    for D in yield_dld_objects():
-        if unknown_args:
-            func_name_list = unknown_args
-            is_push = False
-        else:
-            func_name_list = D.func_map["two"]
-            is_push = True
-
-        for func_name in func_name_list:
-            print("--" * 20)
-            D.func_name = func_name
-            D.msg_append(f"\n【{func_name}】")
-            try:
-                globals()[func_name]()
-            except Exception as e:
-                D.print_info(f"出现异常，本任务结束：{e}")
-                D.msg_append("出现异常，本任务结束，详情查看日志")
-        D.run_time()
-
-        if is_push:
-            print("--" * 20)
-            # pushplus微信推送消息
-            push(f"{D.qq} two", D.msg_join)
-        else:
-            print("--" * 20)
-            print("--------------模拟微信信息--------------")
-            print(D.msg_join)
-
-        print("--" * 20)
+# 当前线程绑定的大乐斗实例
+D = DaLeDouProxy()
+
+
+def run_two(
+    unknown_args: list = None,
+    registry: SessionRegistry | None = None,
+    stagger: bool = False,
+):
+    run_round("two", MISSIONS, unknown_args, registry, stagger)
 
 
 # ============================================================
@@ -109,22 +90,10 @@ def 背包():
     背包物品使用
     """
     yaml: list = D.yaml["背包"]
+    inventory = Inventory.fetch(D)
     data = []
-
-    # 背包
-    D.get("cmd=store&store_type=0")
-    page = int(D.find(r"第1/(\d+)"))
-    for p in range(1, (page + 1)):
-        D.get(f"cmd=store&store_type=0&page={p}")
-        D.print_info(f"查找第 {p} 页")
-        if "使用规则" in D.html:
-            D.find(r"】</p><p>(.*?)<br />")
-            continue
-        _, _html = D.html.split("清理")
-        D.html, _ = _html.split("商店")
-        for _m in yaml:
-            for number, _id in D.findall(rf"{_m}.*?</a>数量：(\d+).*?id=(\d+)"):
-                data.append((_id, int(number)))
+    for _m in yaml:
+        data += [(i["id"], i["number"]) for i in inventory.match(_m)]
 
     for _id, number in set(data):
         if _id in ["3023", "3024", "3025"]:
@@ -185,15 +154,12 @@ def 镶嵌():
 
 
 def 普通合成():
-    data = []
     # 神匠坊背包
-    for p in range(1, 20):
-        # 下一页
-        D.get(f"cmd=weapongod&sub=12&stone_type=0&quality=0&page={p}")
-        D.print_info(f"背包第 {p} 页")
-        data += D.findall(r"拥有：(\d+)/(\d+).*?stone_id=(\d+)")
-        if "下一页" not in D.html:
-            break
+    data = D.get_pages(
+        "cmd=weapongod&sub=12&stone_type=0&quality=0&page={page}",
+        r"拥有：(\d+)/(\d+).*?stone_id=(\d+)",
+        max_pages=19,
+    )
     for possess, consume, _id in data:
         if int(possess) < int(consume):
             # 符石碎片不足
@@ -207,16 +173,13 @@ def 普通合成():
 
 def 符石分解():
     yaml: list[int] = D.yaml["神匠坊"]
-    data = []
 
     # 符石分解
-    for p in range(1, 10):
-        # 下一页
-        D.get(f"cmd=weapongod&sub=9&stone_type=0&page={p}")
-        D.print_info(f"符石分解第 {p} 页")
-        data += D.findall(r"数量:(\d+).*?stone_id=(\d+)")
-        if "下一页" not in D.html:
-            break
+    data = D.get_pages(
+        "cmd=weapongod&sub=9&stone_type=0&page={page}",
+        r"数量:(\d+).*?stone_id=(\d+)",
+        max_pages=9,
+    )
     for num, _id in data:
         if int(_id) not in yaml:
             continue
@@ -284,8 +247,9 @@ def 商店():
         "cmd=exchange&subtype=10&costtype=13",  # 会武
         "cmd=exchange&subtype=10&costtype=14",  # 问鼎天下
     ]
-    for url in urls:
-        D.get(url)
+    # 各商店页面互不依赖，同时查询
+    for html in D.gather(urls):
+        D.html = html
         D.msg_append(D.find())
 
 
@@ -311,3 +275,7 @@ def 新春拜年():
 
 def 乐斗大笨钟():
     c_乐斗大笨钟(D)
+
+
+# 任务注册表
+MISSIONS = build_missions("two", globals())
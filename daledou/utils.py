@@ -1,6 +1,10 @@
+import asyncio
 import re
 import sys
+import threading
 import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timedelta
 from pathlib import Path
 from shutil import copy
@@ -10,69 +14,270 @@ import yaml
 from loguru import logger
 from requests import Session
 
-from daledou import MISSIONS_ONE, MISSIONS_TWO
+from daledou import FUNC_NAMES, REQUEST_BUDGET, get_missions
+from daledou.page import Page
+from daledou.replay import wrap_recording
+from daledou.stats import RequestStats
+from daledou.notify import NOTIFIER
+from daledou.limiter import MAX_ATTEMPTS, RateLimiter, get_cmd, get_pushback
+from daledou.transport import AsyncTransport, run_sync
 
 
-# 请求头
-_HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36 Edg/132.0.0.0",
-}
+# 当前线程（账号）绑定的大乐斗实例
+_current_dld: ContextVar["DaLeDou"] = ContextVar("current_dld")
+
+
+class PatternRegistry:
+    """
+    正则表达式编译缓存
+
+    按 (表达式, flags) 缓存编译结果，不受 re 模块内部缓存容量限制，
+    同一表达式只编译一次
+    """
+
+    def __init__(self):
+        self._patterns: dict[tuple[str, int], re.Pattern] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, mode: str, flags: int = re.S) -> re.Pattern:
+        """
+        返回编译后的正则表达式
+        """
+        key = (mode, flags)
+        if (pattern := self._patterns.get(key)) is not None:
+            self.hits += 1
+            return pattern
+        self.misses += 1
+        pattern = self._patterns[key] = re.compile(mode, flags)
+        return pattern
+
+    def stats(self) -> dict:
+        """
+        返回缓存数量及命中统计
+        """
+        return {
+            "size": len(self._patterns),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# 大乐斗页面匹配使用的正则表达式缓存
+PATTERNS = PatternRegistry()
+
+
+class ConfigStore:
+    """
+    yaml配置文件缓存
+
+    按文件路径缓存解析结果，文件修改时间或大小变化时才重新解析，
+    定时守护进程中修改配置文件无需重启；返回的对象为缓存，调用方不要修改
+    """
+
+    # libyaml可用时使用C实现的解析器
+    Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+    def __init__(self):
+        # 路径 -> (修改时间, 文件大小, 解析结果)
+        self._cache: dict[Path, tuple[int, int, object]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, path: Path):
+        """
+        返回yaml文件解析结果
+        """
+        stat = path.stat()
+        with self._lock:
+            cached = self._cache.get(path)
+            if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                return cached[2]
+            with path.open("r", encoding="utf-8") as fp:
+                data = yaml.load(fp, Loader=self.Loader)
+            self._cache[path] = (stat.st_mtime_ns, stat.st_size, data)
+            return data
+
+
+# config目录配置文件缓存
+CONFIGS = ConfigStore()
 
 
 def read_yaml(file: str, key: str | None = None):
     """
-    读取config目录下的yaml配置文件
+    读取config目录下的yaml配置文件，文件未修改时直接返回缓存
     """
     path = Path(f"./config/{file}")
     try:
-        with path.open("r", encoding="utf-8") as fp:
-            users = yaml.safe_load(fp)
-            return users[key] if key else users
+        users = CONFIGS.load(path)
+        return users[key] if key else users
     except FileNotFoundError:
         raise FileNotFoundError(f"{path} 文件不存在")
     except yaml.YAMLError:
         raise yaml.YAMLError(f"{path} 文件格式不正确")
 
 
+def read_setting(key: str, default=None):
+    """
+    读取settings.yaml中的可选配置，不存在时返回默认值
+    """
+    value = read_yaml("settings.yaml").get(key)
+    return default if value is None else value
+
+
+def get_request_budget(mission_name: str, budget: int | None = None) -> int:
+    """
+    返回任务的请求次数上限，任务未单独声明时使用 settings.yaml 中的 REQUEST_BUDGET
+    """
+    if budget is None:
+        budget = REQUEST_BUDGET.get(mission_name)
+    return budget or read_setting("REQUEST_BUDGET", 500)
+
+
+class RequestBudgetExceeded(Exception):
+    """
+    任务请求次数超过上限
+    """
+
+
+def get_phonepk_url() -> str:
+    """
+    返回大乐斗请求地址，可通过 settings.yaml 中的 DALEDOU_BASE_URL 指向本地模拟服务器
+    """
+    base_url: str = read_setting("DALEDOU_BASE_URL", "https://dld.qzapp.z.qq.com")
+    return f"{base_url.rstrip('/')}/qpet/cgi-bin/phonepk"
+
+
+def setup_console_logger() -> int:
+    """
+    设置控制台输出格式，返回处理器id
+
+    每次运行只需调用一次，各账号的日志文件处理器由 InItDaLeDou 单独添加
+    """
+    logger.remove()
+    return logger.add(
+        sink=sys.stderr,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{message}</level>",
+    )
+
+
+def get_qq(dld_cookie: str) -> str | None:
+    """
+    返回大乐斗Cookie中的QQ，不存在返回None
+    """
+    if result := re.search(r"newuin=(\d+)", dld_cookie, re.S):
+        return result.group(1)
+
+
 def push(title: str, content: str) -> None:
     """
-    pushplus微信通知
+    pushplus微信通知，由后台线程发送，不会阻塞任务（见 daledou/notify.py）
     """
-    if token := read_yaml("settings.yaml", "PUSHPLUS_TOKEN"):
-        url = "http://www.pushplus.plus/send/"
-        data = {
-            "token": token,
-            "title": title,
-            "content": content,
-        }
-        res = requests.post(url, data=data)
-        logger.success(f"pushplus推送信息：{res.json()}")
+    if token := read_setting("PUSHPLUS_TOKEN"):
+        NOTIFIER.push(token, title, content)
     else:
         logger.warning("你没有配置pushplus微信推送")
         print("--" * 20)
 
 
+class SessionRegistry:
+    """
+    账号Session缓存，定时守护进程中长期保存各账号已验证的连接
+
+    同一天内且距上次验证不超过 ttl 秒时直接复用Session（每轮仍重新获取首页过滤任务），
+    否则或者上次运行出现异常时重新验证Cookie
+    """
+
+    def __init__(self, ttl: int):
+        self._ttl = ttl
+        self._entries: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, qq: str, cookie: str) -> dict | None:
+        """
+        返回未过期的缓存，不存在或者已过期返回None
+        """
+        with self._lock:
+            entry = self._entries.get(qq)
+        if entry is None or entry["cookie"] != cookie:
+            return None
+        validated: datetime = entry["validated"]
+        now = datetime.now()
+        if validated.date() != now.date():
+            return None
+        if (now - validated).total_seconds() > self._ttl:
+            return None
+        return entry
+
+    def put(
+        self,
+        qq: str,
+        cookie: str,
+        session: Session,
+        transport: AsyncTransport,
+    ) -> None:
+        """
+        保存刚验证通过的Session，关闭被替换的旧连接
+        """
+        with self._lock:
+            old = self._entries.get(qq)
+            self._entries[qq] = {
+                "cookie": cookie,
+                "session": session,
+                "transport": transport,
+                "validated": datetime.now(),
+            }
+        if old is not None and old["transport"] is not transport:
+            old["transport"].close()
+
+    def invalidate(self, qq: str) -> None:
+        """
+        删除缓存，下次运行时重新验证Cookie
+        """
+        with self._lock:
+            entry = self._entries.pop(qq, None)
+        if entry is not None:
+            entry["transport"].close()
+
+    def owns(self, transport: AsyncTransport | None) -> bool:
+        """
+        判断连接是否由缓存管理
+        """
+        with self._lock:
+            return any(i["transport"] is transport for i in self._entries.values())
+
+
 class InItDaLeDou:
     """
     初始化大乐斗
     """
 
-    def __init__(self, dld_cookie: str):
-        self._setup_console_logger()
+    def __init__(self, dld_cookie: str, registry: SessionRegistry | None = None):
+        self._registry = registry
         self._start_time = f"【开始时间】\n{self._get_datetime_weekday()}"
         self._cookie: str = self._clean_cookie(dld_cookie)
         self._qq: str = self._get_qq()
-        self._session = self._session_add_cookie()
+        self._phonepk_url = get_phonepk_url()
+        self._transport: AsyncTransport | None = None
+        # 本轮验证Cookie时获取的大乐斗首页HTML
+        self._index_html: str | None = None
+        # 启动各阶段耗时
+        self._timing: dict[str, float] = {}
+
+        with self._timer("验证Cookie"):
+            self._session = self._session_add_cookie()
 
         if isinstance(self._session, requests.Session):
-            # 创建QQ任务配置文件
-            self._create_qq_yaml()
-            # 创建QQ日志文件
-            self._handler_id: int = self._create_qq_log()
-            # 大乐斗任务配置
-            self._yaml: dict = read_yaml(f"{self.qq}.yaml")
-            # 获取函数映射
-            self._func_map = self._get_func_map()
+            with self._timer("任务配置"):
+                # 创建QQ任务配置文件
+                self._create_qq_yaml()
+                # 创建QQ日志文件
+                self._handler_id: int = self._create_qq_log()
+                # 大乐斗任务配置
+                self._yaml: dict = read_yaml(f"{self.qq}.yaml")
+            with self._timer("任务过滤"):
+                # 获取函数映射
+                self._func_map = self._get_func_map()
+            self._log_timing()
 
     @property
     def start_time(self) -> str:
@@ -86,6 +291,10 @@ class InItDaLeDou:
     def session(self) -> Session | None:
         return self._session
 
+    @property
+    def transport(self) -> AsyncTransport | None:
+        return self._transport
+
     @property
     def yaml(self) -> dict:
         return self._yaml
@@ -94,15 +303,24 @@ class InItDaLeDou:
     def func_map(self) -> dict | None:
         return self._func_map
 
-    def _setup_console_logger(self) -> int:
+    @contextmanager
+    def _timer(self, name: str):
         """
-        设置控制台输出格式，返回处理器id
+        记录启动阶段耗时
         """
-        logger.remove()
-        return logger.add(
-            sink=sys.stderr,
-            format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{message}</level>",
-        )
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._timing[name] = time.perf_counter() - start
+
+    def _log_timing(self) -> None:
+        """
+        打印启动各阶段耗时
+        """
+        detail = "，".join(f"{k} {v:.2f}s" for k, v in self._timing.items())
+        total = sum(self._timing.values())
+        logger.info(f"{self.qq} | 启动耗时：{detail}，总计 {total:.2f}s")
 
     def _clean_cookie(self, dld_cookie: str) -> str:
         """
@@ -123,22 +341,47 @@ class InItDaLeDou:
         """
         返回 self._cookie 中的QQ
         """
-        return re.search(r"newuin=(\d+)", self._cookie, re.S).group(1)
+        return get_qq(self._cookie)
 
     def _session_add_cookie(self) -> Session | None:
         """
         向Session添加大乐斗Cookie，若Cookie有效则返回Session，否则返回None
-        """
-        url = "https://dld.qzapp.z.qq.com/qpet/cgi-bin/phonepk?cmd=index"
-        with requests.Session() as session:
-            session.cookies.set("Cookie", self._cookie)
-            for _ in range(3):
-                res = session.get(url, headers=_HEADERS, allow_redirects=False)
-                res.encoding = "utf-8"
-                if "商店" in res.text:
-                    logger.success(f"{self.qq} | Cookie有效")
-                    return session
 
+        复用缓存的Session时获取一次本轮首页，首页未找到则删除缓存并重新验证Cookie
+        """
+        url = f"{self._phonepk_url}?cmd=index"
+        if self._registry is not None:
+            if entry := self._registry.get(self.qq, self._cookie):
+                html = entry["transport"].get(
+                    url, allow_redirects=False, stop="【退出】"
+                )
+                if "商店" in html:
+                    logger.success(
+                        f"{self.qq} | Cookie有效（{entry['validated']:%H:%M:%S} 已验证）"
+                    )
+                    self._transport = entry["transport"]
+                    self._index_html = html
+                    return entry["session"]
+                logger.warning(f"{self.qq} | 复用的Session首页未找到，重新验证Cookie")
+                self._registry.invalidate(self.qq)
+
+        session = requests.Session()
+        session.cookies.set("Cookie", self._cookie)
+        self._transport = wrap_recording(
+            AsyncTransport(session, read_setting("HOST_CONCURRENCY", 4)), self.qq
+        )
+        for _ in range(3):
+            # 只需要【退出】之前的任务列表
+            html = self._transport.get(url, allow_redirects=False, stop="【退出】")
+            if "商店" in html:
+                logger.success(f"{self.qq} | Cookie有效")
+                self._index_html = html
+                if self._registry is not None:
+                    self._registry.put(self.qq, self._cookie, session, self._transport)
+                return session
+
+        self._transport.close()
+        self._transport = None
         logger.warning(f"{self.qq} | Cookie无效")
         push(f"{self.qq} | Cookie无效", self._cookie)
 
@@ -155,7 +398,10 @@ class InItDaLeDou:
     def _create_qq_log(self) -> int:
         """
         创建QQ日志文件，返回日志处理器id
+
+        只写入绑定了当前QQ的日志记录（logger.contextualize(qq=...)），多账号并发时互不串写
         """
+        qq = self.qq
         log_dir = Path(f"./log/{self.qq}")
         log_dir.mkdir(parents=True, exist_ok=True)
         log_file = log_dir / f"{datetime.now().strftime('%Y-%m-%d')}.log"
@@ -167,6 +413,7 @@ class InItDaLeDou:
             enqueue=True,
             encoding="utf-8",
             retention="30 days",
+            filter=lambda record: record["extra"].get("qq") == qq,
         )
 
     def _get_datetime_weekday(self) -> str:
@@ -184,8 +431,8 @@ class InItDaLeDou:
         过滤掉未出现在大乐斗首页的任务，并将剩余任务名称映射的函数名称以字典返回
         """
         if _html := self._get_dld_main_page_html():
-            _one = [k for k in MISSIONS_ONE if k in _html]
-            _two = [k for k in MISSIONS_TWO if k in _html]
+            _one = [k for k in get_missions("one") if k in _html]
+            _two = [k for k in get_missions("two") if k in _html]
             return {
                 "one": self._map_mission_names_to_function_names(_one),
                 "two": self._map_mission_names_to_function_names(_two),
@@ -193,14 +440,18 @@ class InItDaLeDou:
 
     def _get_dld_main_page_html(self) -> str | None:
         """
-        获取大乐斗首页HTML源码
+        获取大乐斗首页HTML源码，复用本轮验证Cookie时获取的首页
         """
-        url = "https://dld.qzapp.z.qq.com/qpet/cgi-bin/phonepk?cmd=index"
-        for _ in range(3):
-            response = self._session.get(url, headers=_HEADERS)
-            response.encoding = "utf-8"
-            if "商店" in response.text:
-                return response.text.split("【退出】")[0]
+        url = f"{self._phonepk_url}?cmd=index"
+        if self._index_html is None:
+            for _ in range(3):
+                html = self._transport.get(url, stop="【退出】")
+                if "商店" in html:
+                    self._index_html = html
+                    break
+
+        if self._index_html is not None:
+            return self._index_html.split("【退出】")[0]
 
         logger.warning(f"{self.qq} | 大乐斗首页未找到，可能官方繁忙或者维护")
         push(
@@ -212,11 +463,7 @@ class InItDaLeDou:
         """
         将大乐斗首页任务名称映射为函数名称
         """
-        _data = {
-            # 键为大乐斗首页任务名称，值为函数名称
-            "5.1礼包": "五一礼包",
-        }
-        return [_data.get(k, k) for k in missions]
+        return [FUNC_NAMES.get(k, k) for k in missions]
 
     def remove_logger_handler(self):
         """
@@ -224,13 +471,32 @@ class InItDaLeDou:
         """
         logger.remove(self._handler_id)
 
+    def close(self):
+        """
+        关闭当前QQ的连接池（缓存中的连接除外）并移除日志处理器
+        """
+        if self._registry is not None and self._registry.owns(self._transport):
+            # 由缓存管理的连接保持打开
+            pass
+        elif self._transport is not None:
+            self._transport.close()
+        if self._session is not None:
+            self.remove_logger_handler()
+
 
 class DaLeDou:
     """
     大乐斗实例方法
     """
 
-    def __init__(self, qq: str, session: Session, yaml: dict, func_map: dict):
+    def __init__(
+        self,
+        qq: str,
+        transport: AsyncTransport,
+        yaml: dict,
+        func_map: dict,
+        limiter: RateLimiter | None = None,
+    ):
         self._start_time = time.time()
         self._now = datetime.now()
         self._year: int = self._now.year
@@ -239,7 +505,10 @@ class DaLeDou:
         self._week: int = self._now.weekday() + 1
 
         self._qq = qq
-        self._session = session
+        self._transport = transport
+        self._phonepk_url = get_phonepk_url()
+        self._limiter = limiter or RateLimiter()
+        self._stats = RequestStats()
         self._yaml = yaml
         self._func_map = func_map
 
@@ -247,8 +516,14 @@ class DaLeDou:
         self._msg: list[str] = []
         # 大乐斗当前页面HTML
         self.html = None
+        # 大乐斗当前页面解析结果
+        self._page: Page | None = None
         # 大乐斗日志任务名称
         self.func_name = None
+        # 当前任务的请求次数上限，为None时不限制
+        self.request_budget: int | None = None
+        # 任务名称 -> 已发出的请求次数（含同时进行中的请求）
+        self._issued: dict[str | None, int] = {}
 
     @property
     def now(self) -> datetime:
@@ -282,6 +557,23 @@ class DaLeDou:
     def func_map(self) -> dict:
         return self._func_map
 
+    @property
+    def page(self) -> Page:
+        """
+        当前页面的解析结果，self.html 变化后重新解析
+        """
+        if self._page is None or self._page.html is not self.html:
+            self._page = Page(self.html)
+        return self._page
+
+    @property
+    def limiter(self) -> RateLimiter:
+        return self._limiter
+
+    @property
+    def stats(self) -> RequestStats:
+        return self._stats
+
     @property
     def msg(self) -> list:
         return self._msg
@@ -300,23 +592,123 @@ class DaLeDou:
         if isinstance(message, str):
             self.msg.append(message)
 
-    def get(self, params: str) -> str:
+    def reset_request_budget(self) -> None:
+        """
+        重新计算当前任务的请求次数，交互任务每次用户操作后调用，上限只约束单次操作中的循环
+        """
+        self._issued.pop(self.func_name, None)
+
+    async def aget(self, params: str, stop: str | None = None) -> str:
+        """
+        异步发送get请求获取响应内容，不会修改 self.html
+
+        传入 stop 时读到截止标记即停止读取，只返回标记及之前的内容；
+        请求按 cmd 自适应限速，服务器繁忙时退避重试，重试用尽返回最后一次响应；
+        当前任务请求次数达到上限时抛出 RequestBudgetExceeded 中止任务
+        """
+        url = f"{self._phonepk_url}?{params}"
+        cmd = get_cmd(params)
+        mission = self.func_name
+        budget = self.request_budget
+        issued = self._issued.get(mission, 0)
+        if budget is not None and issued >= budget:
+            raise RequestBudgetExceeded(
+                f"请求次数达到上限 {budget}（{cmd}），本任务中止"
+            )
+        self._issued[mission] = issued + 1
+        start = time.perf_counter()
+        pushbacks = []
+        for attempt in range(MAX_ATTEMPTS):
+            await self._limiter.acquire(cmd)
+            html = await self._transport.fetch(url, stop=stop)
+            if (pushback := get_pushback(html)) is None:
+                self._limiter.on_success(cmd)
+                break
+            pushbacks.append(pushback)
+            self._limiter.on_pushback(cmd)
+            if attempt + 1 < MAX_ATTEMPTS:
+                await self._limiter.backoff(pushback, attempt)
+        else:
+            self._limiter.on_give_up()
+            logger.warning(
+                f"{self.qq} | {cmd}：{pushback}，重试{MAX_ATTEMPTS}次仍未成功"
+            )
+
+        self._stats.record(
+            mission,
+            cmd,
+            seconds=time.perf_counter() - start,
+            size=len(html),
+            retries=attempt,
+            busy=pushbacks.count("系统繁忙"),
+            frequent=pushbacks.count("操作频繁"),
+        )
+        return html
+
+    def get(self, params: str, stop: str | None = None) -> str:
         """
-        发送get请求获取响应内容
+        发送get请求获取响应内容，传入 stop 时只读取到截止标记
         """
-        url = f"https://dld.qzapp.z.qq.com/qpet/cgi-bin/phonepk?{params}"
-        for _ in range(3):
-            res = self._session.get(url, headers=_HEADERS)
-            res.encoding = "utf-8"
-            self.html = res.text
-            if "系统繁忙" in self.html:
-                time.sleep(0.2)
-            elif "操作频繁" in self.html:
-                time.sleep(0.8)
-            else:
-                break
+        self.html = run_sync(self.aget(params, stop))
         return self.html
 
+    def gather(self, params_list: list[str], stop: str | None = None) -> list[str]:
+        """
+        同时发送多个互不依赖的get请求，按顺序返回响应内容，不会修改 self.html
+        """
+
+        async def _gather():
+            return await asyncio.gather(*(self.aget(p, stop) for p in params_list))
+
+        return list(run_sync(_gather()))
+
+    def get_pages(
+        self,
+        params: str,
+        mode: str,
+        pages: int | None = None,
+        max_pages: int = 20,
+        batch: int = 4,
+    ) -> list:
+        """
+        同时请求分页列表的多个页面，按页码顺序合并每页 findall 的结果
+
+        Args:
+            params：请求参数，页码位置为 {page}
+            mode：每页匹配的正则表达式
+            pages：总页数，已知时同时请求全部页面
+            max_pages：总页数未知时最多请求的页数
+            batch：总页数未知时先单独请求第一页，有"下一页"时再从第二页起每次同时请求的页数，
+                遇到没有"下一页"的页面结束
+
+        self.html 为最后一页的响应内容
+        """
+        if pages is not None:
+            numbers = [list(range(1, pages + 1))]
+        else:
+            # 大多数列表只有一页，第一页单独请求，避免多发请求
+            numbers = [[1]] + [
+                list(range(p, min(p + batch, max_pages + 1)))
+                for p in range(2, max_pages + 1, batch)
+            ]
+
+        pattern = PATTERNS.compile(mode)
+        result = []
+        count = 0
+        last = False
+        for chunk in numbers:
+            for html in self.gather([params.format(page=p) for p in chunk]):
+                self.html = html
+                count += 1
+                result += pattern.findall(html)
+                # 总页数未知时没有下一页即为最后一页，之后的页面丢弃
+                if last := pages is None and "下一页" not in html:
+                    break
+            if last:
+                break
+        self.print_info(f"共读取 {count} 页")
+        return result
+
     def print_info(self, message: str, name=None) -> None:
         """
         打印信息
@@ -331,7 +723,7 @@ class DaLeDou:
 
         无论结果如何都会被打印并写入日志
         """
-        _match = re.search(mode, self.html, re.S)
+        _match = PATTERNS.compile(mode).search(self.html)
         result = _match.group(1) if _match else None
         self.print_info(result, name)
         return result
@@ -340,7 +732,7 @@ class DaLeDou:
         """
         查找大乐斗HTML字符串源码中所有匹配正则表达式的子串
         """
-        return re.findall(mode, self.html, re.S)
+        return PATTERNS.compile(mode).findall(self.html)
 
     def is_arrive_date(self, days: int, year_month_day: tuple) -> bool:
         """
@@ -373,22 +765,89 @@ class DaLeDou:
         self.msg_append(
             f"\n【运行耗时】\n耗时：{int(time.time() - self._start_time)} s"
         )
+        stats = self._limiter.stats()
+        self.print_info(
+            f"限速等待 {stats['throttled']} 次，繁忙重试 {stats['retried']} 次，"
+            f"放弃 {stats['gave_up']} 次",
+            "请求统计",
+        )
+        self.log_request_stats()
+
+    def log_request_stats(self, top: int = 10):
+        """
+        打印请求耗时最多的任务，配置 REQUEST_STATS_JSON 时保存全部统计为JSON文件
+        """
+        for name, hist in self._stats.hot_list()[:top]:
+            self.print_info(
+                f"{name} 请求 {hist.count} 次，耗时 {hist.seconds:.2f}s，"
+                f"最长 {hist.max_seconds:.2f}s，重试 {hist.retries} 次",
+                "请求热点",
+            )
+        if read_setting("REQUEST_STATS_JSON", False):
+            path = Path(
+                f"./log/{self.qq}/requests-{datetime.now():%Y-%m-%d-%H%M%S}.json"
+            )
+            self._stats.dump_json(path)
+            self.print_info(f"统计文件：{path}", "请求统计")
+
+
+class DaLeDouProxy:
+    """
+    大乐斗实例代理
+
+    任务模块通过模块级 D 访问当前线程绑定的 DaLeDou 实例，
+    多账号并发时每个账号线程各自绑定自己的实例
+    """
+
+    def __getattr__(self, name: str):
+        return getattr(_current_dld.get(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(_current_dld.get(), name, value)
+
+
+@contextmanager
+def bind_dld(D: DaLeDou):
+    """
+    将大乐斗实例绑定到当前线程，并为该线程的日志记录附加QQ
+    """
+    token = _current_dld.set(D)
+    try:
+        with logger.contextualize(qq=D.qq):
+            yield D
+    finally:
+        _current_dld.reset(token)
+
+
+def create_dld_object(
+    cookie: str, registry: SessionRegistry | None = None
+) -> tuple[InItDaLeDou, DaLeDou | None]:
+    """
+    登录并返回初始化对象和大乐斗实例，Cookie无效或者首页未找到时实例为None
+    """
+    dld = InItDaLeDou(cookie, registry)
+    if dld.session is None or dld.func_map is None:
+        return dld, None
 
+    D = DaLeDou(dld.qq, dld.transport, dld.yaml, dld.func_map)
+    D.msg_append(dld.start_time)
+    return dld, D
 
-def yield_dld_objects():
+
+def yield_dld_objects(registry: SessionRegistry | None = None):
     """
-    返回大乐斗实例对象
+    依次返回已绑定到当前线程的大乐斗实例对象
     """
+    setup_console_logger()
     dld_cookies: list[str] = read_yaml("settings.yaml", "DALEDOU_ACCOUNT")
     for cookie in dld_cookies:
-        dld = InItDaLeDou(cookie)
-        if dld.session is None:
-            continue
-        if dld.func_map is None:
+        with logger.contextualize(qq=get_qq(cookie)):
+            dld, D = create_dld_object(cookie, registry)
+        if D is None:
+            dld.close()
             continue
 
-        D = DaLeDou(dld.qq, dld.session, dld.yaml, dld.func_map)
-        D.msg_append(dld.start_time)
-        yield D
+        with bind_dld(D):
+            yield D
 
-        dld.remove_logger_handler()
+        dld.close()
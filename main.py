@@ -18,30 +18,58 @@
     手动运行 other.py 中的 神装:
         python main.py --other 神装
 
+    中断后重新运行会跳过今天已完成的任务，忽略断点重新运行第一轮全部任务:
+        python main.py --one --fresh
+
+    运行第一轮并录制请求及响应到 ./fixtures:
+        python main.py --one --record
+
+    回放录制的页面，统计第一轮各任务的 CPU 时间、请求次数及内存:
+        python main.py --bench one
+        python main.py --bench one 邪神秘宝
+
+    记录各任务的请求次数及耗时，查看最近7天各任务的 p50/p95 成本:
+        python main.py --one --profile
+        python main.py --stats
+
 如果使用 uv 包管理器，则将上面 python 替换为 uv run
 """
 
 import argparse
-import time
-
-from schedule import every, repeat, run_pending
 
+from daledou.bench import run_bench
+from daledou.checkpoint import disable_resume
 from daledou.other import run_other
 from daledou.one import run_one
+from daledou.profiler import enable_profiling, print_stats
+from daledou.replay import enable_recording
+from daledou.scheduler import Daemon
 from daledou.two import run_two
-from daledou.utils import yield_dld_objects
+from daledou.utils import SessionRegistry, read_setting, yield_dld_objects
+
+
+# 定时守护进程中长期保存的各账号Session
+SESSIONS = SessionRegistry(read_setting("SESSION_TTL", 28800))
 
 
-@repeat(every().day.at("13:10"))
 def job_one():
-    # 每天 13:10 运行第一轮
-    run_one()
+    # 默认每天 13:10 运行第一轮
+    run_one(registry=SESSIONS, stagger=True)
 
 
-@repeat(every().day.at("20:01"))
 def job_two():
-    # 每天 20:01 运行第二轮
-    run_two()
+    # 默认每天 20:01 运行第二轮
+    run_two(registry=SESSIONS, stagger=True)
+
+
+def get_jobs() -> list:
+    """
+    返回定时任务，运行时间可在 settings.yaml 中修改，发送 SIGHUP 信号重新读取
+    """
+    return [
+        ("第一轮", read_setting("TIMING_ONE", "13:10"), job_one),
+        ("第二轮", read_setting("TIMING_TWO", "20:01"), job_two),
+    ]
 
 
 def run_serve():
@@ -52,30 +80,59 @@ def run_serve():
     group.add_argument("--one", nargs="*", metavar="函数名称", help="大乐斗第一轮任务")
     group.add_argument("--two", nargs="*", metavar="函数名称", help="大乐斗第二轮任务")
     group.add_argument("--other", nargs="*", metavar="函数名称", help="大乐斗其它任务")
+    group.add_argument(
+        "--bench", nargs="+", metavar="轮次 函数名称", help="离线回放基准测试"
+    )
+    group.add_argument(
+        "--stats",
+        nargs="?",
+        const=7,
+        type=int,
+        metavar="天数",
+        help="打印最近N天（默认7天）各任务的请求成本",
+    )
+    parser.add_argument(
+        "--record", action="store_true", help="录制请求及响应到 ./fixtures"
+    )
+    parser.add_argument(
+        "--fresh", action="store_true", help="忽略今天的断点记录，重新运行全部任务"
+    )
+    parser.add_argument(
+        "--profile", action="store_true", help="记录各任务请求成本到 ./log"
+    )
 
     print("--" * 20)
     args = parser.parse_args()
+    if args.record:
+        enable_recording()
+    if args.fresh:
+        disable_resume()
+    if args.profile:
+        enable_profiling()
     if args.timing is not None:
-        for _ in yield_dld_objects():
+        for _ in yield_dld_objects(SESSIONS):
             print("--" * 20)
         print("定时任务守护进程已启动：")
         print("第一轮默认 13:10 定时运行")
         print("第二轮默认 20:01 定时运行")
+        print("修改 settings.yaml 后发送 SIGHUP 信号重新读取运行时间")
         print("\n手动运行第一轮命令：")
         print("python main.py --one 或者 uv run main.py --one")
         print("\n手动运行第二轮命令：")
         print("python main.py --two 或者 uv run main.py --two")
         print("\n强制结束脚本按键：CTRL + C")
         print("--" * 20)
-        while True:
-            run_pending()
-            time.sleep(1)
+        Daemon(get_jobs, read_setting("MISSED_RUN_GRACE", 3600)).run_forever()
     elif args.one is not None:
         run_one(args.one)
     elif args.two is not None:
         run_two(args.two)
     elif args.other is not None:
         run_other(args.other)
+    elif args.bench is not None:
+        run_bench(args.bench[0], args.bench[1:])
+    elif args.stats is not None:
+        print_stats(args.stats)
 
 
 if __name__ == "__main__":